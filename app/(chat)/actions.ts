@@ -18,6 +18,7 @@ import {
   ScrapeResult,
   RerankResponse,
 } from "@/lib/search/types";
+import { decodeEmbeddings } from "@/lib/embeddings";
 import { join } from "path";
 import { ArtifactKind } from "@/components/artifact";
 import { readdir } from "fs/promises";
@@ -914,7 +915,8 @@ export async function getEmbeddingsFromPython(
       headers: {
         "Content-Type": "application/json",
       },
-      body: JSON.stringify({ texts }),
+      // base64 float16 instead of a JSON number per dimension
+      body: JSON.stringify({ texts, format: "b64" }),
     });
 
     if (!response.ok) {
@@ -929,7 +931,7 @@ export async function getEmbeddingsFromPython(
 
     const result = await response.json();
 
-    if (!result || !Array.isArray(result.embeddings)) {
+    if (!result || typeof result.data !== "string" || !result.shape) {
       console.error(
         "Invalid response format from Python embedding server:",
         result
@@ -937,10 +939,11 @@ export async function getEmbeddingsFromPython(
       throw new Error("Invalid response format from Python embedding server.");
     }
 
+    const embeddings = decodeEmbeddings(result);
     console.log(
-      `[ACTION] Received ${result.embeddings.length} embeddings from Python server.`
+      `[ACTION] Received ${embeddings.length} embeddings from Python server.`
     );
-    return result.embeddings;
+    return embeddings;
   } catch (error) {
     console.error("Error calling Python embedding server:", error);
     // Re-throw the error to be handled by the caller
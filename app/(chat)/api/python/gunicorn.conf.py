@@ -0,0 +1,22 @@
+import os
+
+# Production server settings: `gunicorn -c gunicorn.conf.py server:app`
+#
+# A single worker process keeps one copy of each model in memory; threads
+# provide concurrency because model inference and document parsing release
+# the GIL inside their C/C++ kernels. Hosts with memory to spare can run more
+# workers with WEB_CONCURRENCY, which server.py also uses to split the cores
+# between the workers' inference thread pools.
+bind = f"0.0.0.0:{os.environ.get('PORT', 5328)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 16))
+# Scraping and code execution requests can legitimately run for a while; keep
+# this above SCRAPE_TIMEOUT and the code executor's MAX_TIMEOUT
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+
+
+def post_worker_init(worker):
+    """Warm up each worker once its copy of the app is loaded"""
+    from server import warm_up
+    warm_up()
@@ -3,25 +3,45 @@ Deep Research Python Backend Modules
 
 This package contains modular components for the Deep Research Python backend:
 - document_converter: Document URL to text conversion
+- pdf_pages: PDF page extraction for the parallel page workers
 - embedding_service: Text embedding generation
+- onnx_backend: int8 ONNX Runtime model export and inference
 - reranker_service: Document reranking based on queries
 - scraper_processor: Web scraping and content extraction
 - quality_filter: Content quality filtering
+- event_loop: Shared background asyncio event loop
 - chunker: Text chunking for processing
+- tmpfs: RAM-backed temporary directory selection
 """
 
-from .document_converter import convert_document_from_url
-from .embedding_service import embedding_service
-from .reranker_service import reranker_service
-from .quality_filter import quality_filter_service
-from .scraper_processor import ScraperProcessor
+import importlib
+
+# The chunker instance shadows its submodule's name, so it is bound eagerly;
+# chunker.py only imports the text splitter
 from .chunker import chunker
 
-__all__ = [
-    'convert_document_from_url',
-    'embedding_service',
-    'reranker_service',
-    'quality_filter_service',
-    'ScraperProcessor',
-    'chunker',
-]
+# Everything else is imported on first access. Worker processes that unpickle
+# one module's functions (e.g. the document converter's spawned pools) then
+# skip torch, sentence-transformers and crawl4ai
+_LAZY_EXPORTS = {
+    'convert_document_from_url': 'document_converter',
+    'convert_document_batch': 'document_converter',
+    'get_embedding_service': 'embedding_service',
+    'get_reranker_service': 'reranker_service',
+    'get_quality_filter_service': 'quality_filter',
+    'run_async': 'event_loop',
+    'ScraperProcessor': 'scraper_processor',
+}
+
+
+def __getattr__(name):
+    """Import the submodule behind a lazy export on first access"""
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = [*_LAZY_EXPORTS, 'chunker']
@@ -1,47 +1,260 @@
+import os
+import re
+import hashlib
 import logging
-from typing import List
+import threading
+from collections import OrderedDict
+from bisect import bisect_left
+from functools import lru_cache
+from typing import List, Tuple
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 logger = logging.getLogger(__name__)
 
+# Ordered from strongest to weakest boundary
+SEPARATORS = ["\n\n", "\n", ". ", " "]
+_SEPARATOR_RE = re.compile("|".join(re.escape(s) for s in SEPARATORS))
+
+# "regex" uses the fast splitter below, "langchain" the original recursive one
+CHUNKER_BACKEND = os.environ.get("CHUNKER_BACKEND", "regex")
+
+# "tokens" measures chunks with the embedding model's tokenizer, "chars" with len()
+CHUNKER_LENGTH_UNIT = os.environ.get("CHUNKER_LENGTH_UNIT", "tokens")
+
+# Tokenizer measuring chunks in "tokens" mode: the embedding model's, so
+# chunks fill (but do not overflow) its input window
+TOKENIZER_MODEL = os.environ.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+# MiniLM's max_seq_length: the tokens it embeds, special tokens included
+EMBEDDING_WINDOW = 256
+
+# Default (chunk_size, chunk_overlap) per unit; token chunks leave room for the
+# [CLS]/[SEP] the model adds, so a full chunk is embedded without truncation
+DEFAULT_SIZES = {
+    "tokens": (EMBEDDING_WINDOW - 2, 50),
+    "chars": (500, 100),
+}
+
+# Documents whose split offsets are remembered; re-scraped pages with unchanged
+# content skip the tokenizer pass and the boundary search
+CHUNK_CACHE_SIZE = int(os.environ.get("CHUNK_CACHE_SIZE", 4096))
+
 
 class Chunker:
-    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 100):
+    def __init__(self, chunk_size: int = None, chunk_overlap: int = None,
+                 use_fast_splitter: bool = CHUNKER_BACKEND != "langchain",
+                 length_unit: str = CHUNKER_LENGTH_UNIT):
         """Initialize the text chunker with size and overlap parameters"""
-        self.chunk_size = chunk_size
-        self.chunk_overlap = chunk_overlap
-        self.splitter = RecursiveCharacterTextSplitter(
-            separators=["\n\n", "\n", ". ", " "],  # More robust separators
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len
-        )
+        # Sizes left to the defaults follow the unit if it falls back to characters
+        self._default_size = chunk_size is None
+        self._default_overlap = chunk_overlap is None
+        default_size, default_overlap = DEFAULT_SIZES[length_unit]
+        self.chunk_size = chunk_size if chunk_size is not None else default_size
+        self.chunk_overlap = chunk_overlap if chunk_overlap is not None else default_overlap
+        self.use_fast_splitter = use_fast_splitter
+        self.length_unit = length_unit
+        self._tokenizer = None
+        self._tokenizer_loaded = length_unit != "tokens"
+        self._tokenizer_lock = threading.Lock()
+        self.splitter = self._create_splitter()
+        # LRU of text digest -> chunk offsets, shared by the parse pool threads
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
         logger.info(
-            f"Initialized chunker with size={chunk_size}, overlap={chunk_overlap}")
+            f"Initialized chunker with size={self.chunk_size}, overlap={self.chunk_overlap} ({length_unit}), fast={use_fast_splitter}")
 
-    def split_text(self, text: str) -> List[str]:
-        """Split text into chunks using the configured splitter"""
+    def _get_tokenizer(self):
+        """Lazily load the embedding model's fast tokenizer (None if unavailable)"""
+        if not self._tokenizer_loaded:
+            # Concurrent first callers wait here rather than chunking with
+            # sizes that are about to change
+            with self._tokenizer_lock:
+                if not self._tokenizer_loaded:
+                    self._tokenizer = self._load_tokenizer()
+                    if self._tokenizer is None:
+                        self._fall_back_to_chars()
+                    elif self._default_size:
+                        # Exactly the room this tokenizer's special tokens leave
+                        self.chunk_size = EMBEDDING_WINDOW - \
+                            self._tokenizer.num_special_tokens_to_add()
+                        self.splitter = self._create_splitter()
+                    self._tokenizer_loaded = True
+        return self._tokenizer
+
+    def _load_tokenizer(self):
+        """Load just the tokenizer files of TOKENIZER_MODEL, never the model weights"""
+        model_id = TOKENIZER_MODEL if "/" in TOKENIZER_MODEL else f"sentence-transformers/{TOKENIZER_MODEL}"
+        try:
+            from transformers import AutoTokenizer
+            tokenizer = AutoTokenizer.from_pretrained(model_id)
+        except Exception as e:
+            logger.warning(f"Failed to load tokenizer '{model_id}': {str(e)}")
+            return None
+        if not getattr(tokenizer, 'is_fast', False):
+            logger.warning(f"Tokenizer '{model_id}' has no fast implementation")
+            return None
+        return tokenizer
+
+    def _fall_back_to_chars(self):
+        """Measure chunks in characters, with character-sized defaults"""
+        self.length_unit = "chars"
+        default_size, default_overlap = DEFAULT_SIZES["chars"]
+        if self._default_size:
+            self.chunk_size = default_size
+        if self._default_overlap:
+            self.chunk_overlap = default_overlap
+        self.splitter = self._create_splitter()
+        logger.warning(
+            f"No fast tokenizer available, chunking by characters with size={self.chunk_size}, overlap={self.chunk_overlap}")
+
+    def _length_function(self):
+        """Length measure for the LangChain splitter"""
+        @lru_cache(maxsize=4096)
+        def token_length(text: str) -> int:
+            # The splitter measures the same pieces repeatedly while merging
+            tokenizer = self._get_tokenizer()
+            if tokenizer is None:
+                return len(text)
+            return len(tokenizer.encode(text, add_special_tokens=False))
+
+        return token_length if self.length_unit == "tokens" else len
+
+    def _create_splitter(self):
+        """Build the LangChain splitter used when the fast path is disabled"""
+        return RecursiveCharacterTextSplitter(
+            separators=SEPARATORS,  # More robust separators
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            length_function=self._length_function()
+        )
+
+    def _token_starts(self, text: str):
+        """Character offset of every token in text, from one Rust tokenizer pass"""
+        tokenizer = self._get_tokenizer()
+        if tokenizer is None:
+            return None
+        offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True,
+                            verbose=False)["offset_mapping"]
+        return [start for start, _ in offsets]
+
+    def _fast_split(self, text: str) -> List[Tuple[int, int]]:
+        """Split text by packing separator-delimited spans up to chunk_size.
+
+        Each chunk ends at the last strongest boundary that fits, like the
+        recursive splitter, but boundaries are located with C-level searches
+        over the window instead of recursively re-splitting the whole text.
+        In token mode the window is derived from the token offsets. Returns
+        whitespace-trimmed (start, end) offsets, so no substrings are built.
+        """
+        length = len(text)
+        token_starts = self._token_starts(text)
+
+        def shift(position: int, units: int) -> int:
+            """Character position `units` chars/tokens away from position"""
+            if token_starts is None:
+                return min(max(position + units, 0), length)
+            index = bisect_left(token_starts, position) + units
+            if index >= len(token_starts):
+                return length
+            return token_starts[max(index, 0)]
+
+        offsets = []
+        start = 0
+        prev_end = 0
+        while start < length:
+            limit = shift(start, self.chunk_size)
+            end = length
+            if limit < length:
+                end = limit  # Hard cut if no separator fits
+                # Boundaries inside the overlap would only re-emit old text
+                search_from = max(start, prev_end)
+                for separator in SEPARATORS:
+                    index = text.rfind(separator, search_from, limit)
+                    if index != -1:
+                        end = index + len(separator)
+                        break
+
+            # Trim surrounding whitespace without materializing the chunk
+            chunk_start, chunk_end = start, end
+            while chunk_start < chunk_end and text[chunk_start].isspace():
+                chunk_start += 1
+            while chunk_end > chunk_start and text[chunk_end - 1].isspace():
+                chunk_end -= 1
+            if chunk_start < chunk_end:
+                offsets.append((chunk_start, chunk_end))
+            if end >= length:
+                break
+
+            # Start the next chunk at the first boundary inside the overlap window
+            next_start = end
+            if self.chunk_overlap:
+                match = _SEPARATOR_RE.search(
+                    text, max(start + 1, shift(end, -self.chunk_overlap)), end)
+                if match and match.end() < end:
+                    next_start = match.end()
+            prev_end = end
+            start = next_start
+
+        return offsets
+
+    def _locate_chunks(self, text: str, chunks: List[str]) -> List[Tuple[int, int]]:
+        """Offsets of LangChain chunks, which are substrings of text in order"""
+        offsets = []
+        cursor = 0
+        for chunk in chunks:
+            start = text.find(chunk, cursor)
+            if start == -1:
+                start = text.find(chunk)
+            offsets.append((start, start + len(chunk)))
+            cursor = start + 1
+        return offsets
+
+    def split_offsets(self, text: str) -> List[Tuple[int, int]]:
+        """Split text into chunks, returned as (start, end) offsets into text"""
         if not text or not text.strip():
             logger.warning("Attempted to chunk empty text")
             return []
+        # Settle the length unit (and sizes) before they are used
+        self._get_tokenizer()
+
+        key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+        with self._cache_lock:
+            offsets = self._cache.get(key)
+            if offsets is not None:
+                self._cache.move_to_end(key)
+        if offsets is not None:
+            logger.info(f"Reused {len(offsets)} cached chunks")
+            return list(offsets)
+
+        if self.use_fast_splitter:
+            offsets = self._fast_split(text)
+        else:
+            offsets = self._locate_chunks(text, self.splitter.split_text(text))
+        logger.info(f"Split text into {len(offsets)} chunks")
 
-        chunks = self.splitter.split_text(text)
-        logger.info(f"Split text into {len(chunks)} chunks")
-        return chunks
+        with self._cache_lock:
+            self._cache[key] = tuple(offsets)
+            while len(self._cache) > CHUNK_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return offsets
+
+    def split_text(self, text: str) -> List[str]:
+        """Split text into chunks using the configured splitter"""
+        return [text[start:end] for start, end in self.split_offsets(text)]
 
     def update_parameters(self, chunk_size: int = None, chunk_overlap: int = None):
         """Update chunker parameters and reinitialize the splitter"""
         if chunk_size is not None:
             self.chunk_size = chunk_size
+            self._default_size = False
         if chunk_overlap is not None:
             self.chunk_overlap = chunk_overlap
+            self._default_overlap = False
 
-        self.splitter = RecursiveCharacterTextSplitter(
-            separators=["\n\n", "\n", ". ", " "],
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            length_function=len
-        )
+        self.splitter = self._create_splitter()
+        # Offsets computed with the old parameters no longer apply
+        with self._cache_lock:
+            self._cache.clear()
         logger.info(
             f"Updated chunker parameters: size={self.chunk_size}, overlap={self.chunk_overlap}")
 
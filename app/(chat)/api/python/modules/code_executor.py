@@ -1,14 +1,22 @@
 import subprocess
 import sys
+import asyncio
 import logging
 import tempfile
 import os
 import shutil
-import requests  # Added for fetching input files
-from urllib.parse import urljoin  # For constructing absolute URLs if needed
+import httpx  # Concurrent fetching of input files
+from urllib.parse import urljoin, urlparse, unquote  # For constructing absolute URLs if needed
 import uuid  # For unique plot filenames
+from pathlib import PurePath
+import queue
+import threading
 import logging
 
+from .event_loop import run_async
+from .exec_worker import PLOT_FILENAME
+from .tmpfs import ram_temp_dir
+
 # --- Logging Setup ---
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,11 +45,15 @@ logger = logging.getLogger(__name__)
 # --- Configuration ---
 DEFAULT_TIMEOUT = 10  # seconds
 MAX_TIMEOUT = 60      # Maximum allowable timeout
-PLOT_FILENAME = "plot.png"
+INPUT_FILE_FETCH_TIMEOUT = 10  # seconds, per input file
+# Idle pre-warmed interpreters kept ready for incoming executions
+WORKER_POOL_SIZE = int(os.environ.get("CODE_EXECUTOR_POOL_SIZE", 2))
+WORKER_SCRIPT = os.path.join(_MODULE_DIR, "exec_worker.py")
 # TEMP_PLOT_BASE_URL = "/api/python/temp_plots/"  # No longer needed
 
 # --- Security Best Practices (Simplified for Initial Implementation) ---
-# 1. Run in Subprocess: Isolates from the main server process.
+# 1. Run in Subprocess: Isolates from the main server process. Each pre-warmed
+#    worker runs exactly one execution and exits, so no state is shared.
 # 2. Timeout: Prevents runaway code execution (DoS).
 # 3. No Network (Implicit): Standard library code has access, but we don't explicitly grant more.
 # 4. Limited Filesystem (Implicit): Runs as the server user, can access what the server can.
@@ -53,41 +65,111 @@ PLOT_FILENAME = "plot.png"
 #       during the setup phase. Ensure the URLs passed are trusted or implement
 #       strict validation/allowlisting if fetching from external sources.
 
-# --- Matplotlib Setup Code ---
-# This code will be prepended to the user's code to configure Matplotlib
-# and attempt to capture plots automatically.
-MATPLOTLIB_SETUP_CODE = f"""
-import sys
-import os
-# Ensure the backend is set *before* importing pyplot
-import matplotlib
-matplotlib.use('Agg') # Use non-interactive backend good for saving files
-import matplotlib.pyplot as plt
-
-# --- Auto-saving plot ---
-_original_show = plt.show
-_plot_saved = False
-
-def _save_and_show(*args, **kwargs):
-    global _plot_saved
-    if not _plot_saved: # Save only the first plot generated
-        try:
-            # Save the current figure to the predefined path in the CWD
-            plt.savefig('{PLOT_FILENAME}')
-            _plot_saved = True
-            print(f"[Plot saved to {PLOT_FILENAME}]", file=sys.stderr) # Info for debugging
-        except Exception as e:
-            print(f"Error saving plot: {{e}}", file=sys.stderr)
-    # We don't call the original show because we're in a non-GUI environment
-    # _original_show(*args, **kwargs)
-    plt.close() # Close the plot to free memory
-
-# Monkey-patch plt.show
-plt.show = _save_and_show
+class _WorkerPool:
+    """Keeps interpreters that have already imported matplotlib/numpy waiting for code."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle = queue.Queue()
+        for _ in range(size):
+            self._refill()
+
+    def _spawn(self):
+        return subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            env={**os.environ, "PYTHONIOENCODING": "utf-8"},
+        )
 
-# --- End Matplotlib Setup ---
+    def _refill(self):
+        """Start a replacement worker in the background"""
+        threading.Thread(target=lambda: self._idle.put(self._spawn()),
+                         daemon=True).start()
 
-"""
+    def _acquire(self):
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                # Pool drained by concurrent requests: start one cold
+                logger.info("No pre-warmed worker available, starting one.")
+                return self._spawn()
+            if worker.poll() is None:
+                return worker
+            # Worker died while idle; discard it and keep looking
+
+    def run(self, code: str, cwd: str, timeout: float) -> subprocess.CompletedProcess:
+        """Execute code in a worker with cwd as its working directory."""
+        worker = self._acquire()
+        self._refill()
+        try:
+            stdout, stderr = worker.communicate(
+                input=f"{cwd}\n{code}", timeout=timeout)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+            stdout, stderr = worker.communicate()
+            raise subprocess.TimeoutExpired(
+                worker.args, timeout, output=stdout, stderr=stderr)
+        return subprocess.CompletedProcess(worker.args, worker.returncode, stdout, stderr)
+
+
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """Shared pool of pre-warmed interpreters, started on first use"""
+    global _worker_pool
+    if _worker_pool is None:
+        # Never at import time: processes that merely import this module
+        # (e.g. spawned workers) must not start interpreters of their own
+        with _worker_pool_lock:
+            if _worker_pool is None:
+                _worker_pool = _WorkerPool(WORKER_POOL_SIZE)
+    return _worker_pool
+
+
+def _resolve_local_upload(url: str):
+    """Map an /api/uploads/<chat_id>/<filename> URL to its file in UPLOADS_DIR, if present."""
+    parsed = urlparse(url)
+    if parsed.netloc and parsed.netloc != urlparse(FRONTEND_BASE_URL).netloc:
+        return None
+    if not parsed.path.startswith('/api/uploads/'):
+        return None
+
+    parts = [unquote(p) for p in parsed.path[len('/api/uploads/'):].split('/')]
+    uploads_real = os.path.realpath(UPLOADS_DIR)
+    source_path = os.path.realpath(os.path.join(uploads_real, *parts))
+    # Never follow a URL outside the uploads directory
+    if not PurePath(source_path).is_relative_to(uploads_real):
+        return None
+    return source_path if os.path.isfile(source_path) else None
+
+
+# Created on the shared event loop and kept open so connections to the
+# frontend are reused across executions
+_client = None
+
+
+async def _fetch_input_files(urls: list) -> list:
+    """Fetch all input files concurrently; failed fetches are returned as exceptions."""
+    global _client
+    if _client is None:
+        # Consider adding headers if authentication is needed for the /api/uploads endpoint
+        _client = httpx.AsyncClient(
+            timeout=INPUT_FILE_FETCH_TIMEOUT, follow_redirects=True)
+
+    async def _fetch(url):
+        response = await _client.get(url)
+        response.raise_for_status()  # Raise HTTPStatusError for 4xx or 5xx
+        return response.content
+
+    return await asyncio.gather(*[_fetch(url) for url in urls], return_exceptions=True)
 
 
 def execute_python_code(code: str, input_files: list = [], timeout: int = DEFAULT_TIMEOUT, chat_id: str = None) -> dict:
@@ -130,46 +212,66 @@ def execute_python_code(code: str, input_files: list = [], timeout: int = DEFAUL
     # Create a temporary directory for execution
     temp_dir_path = None
     try:
-        # Create a temporary directory
-        temp_dir_path = tempfile.mkdtemp()
+        # Create a temporary directory, on tmpfs when there is room
+        temp_dir_path = tempfile.mkdtemp(dir=ram_temp_dir())
         temp_dir_name = os.path.basename(
             temp_dir_path)  # Get the unique dir name
         logger.info(f"Created temporary directory: {temp_dir_path}")
 
         # --- Fetch and Write Input Files ---
+        pending_files = []  # (filename, target_path, absolute_url)
+        temp_dir_real = os.path.realpath(temp_dir_path)
         for file_info in input_files:
             filename = file_info['filename']
             url = file_info['url']
-            target_path = os.path.join(temp_dir_path, filename)
+            target_path = os.path.realpath(
+                os.path.join(temp_dir_path, filename))
 
-            # Basic security: prevent writing outside the temp dir
-            if os.path.commonprefix([os.path.abspath(target_path), os.path.abspath(temp_dir_path)]) != os.path.abspath(temp_dir_path):
+            # Basic security: prevent writing outside the temp dir (symlinks resolved)
+            if target_path == temp_dir_real or not PurePath(target_path).is_relative_to(temp_dir_real):
                 logger.error(
                     f"Skipping input file due to invalid path: {filename}")
                 result[
                     "stderr"] += f"\n[Warning: Skipped input file with potentially unsafe path: {filename}]"
                 continue
 
+            # Uploads already live on this machine: copy them instead of a
+            # round trip through the Next.js server
+            local_path = _resolve_local_upload(url)
+            if local_path:
+                try:
+                    shutil.copyfile(local_path, target_path)
+                    logger.info(
+                        f"Copied local upload {local_path} to {target_path}")
+                    continue
+                except OSError as copy_err:
+                    logger.warning(
+                        f"Local copy of {local_path} failed, fetching over HTTP instead: {copy_err}")
+
+            logger.info(
+                f"Fetching input file '{filename}' from relative path {url}")
+            # Construct absolute URL using the configured FRONTEND_BASE_URL
+            absolute_url = urljoin(
+                FRONTEND_BASE_URL, url) if url.startswith('/') else url
+            logger.debug(f"Absolute URL for fetching: {absolute_url}")
+            pending_files.append((filename, target_path, absolute_url))
+
+        # Fetch concurrently so N files cost one round trip instead of N
+        fetched = run_async(_fetch_input_files(
+            [absolute_url for _, _, absolute_url in pending_files])) if pending_files else []
+
+        for (filename, target_path, absolute_url), content in zip(pending_files, fetched):
             try:
-                logger.info(
-                    f"Fetching input file '{filename}' from relative path {url}")
-                # Construct absolute URL using the configured FRONTEND_BASE_URL
-                absolute_url = urljoin(
-                    FRONTEND_BASE_URL, url) if url.startswith('/') else url
-                logger.debug(f"Absolute URL for fetching: {absolute_url}")
-
-                # Add timeout for fetch
-                # Consider adding headers if authentication is needed for the /api/uploads endpoint
-                response = requests.get(absolute_url, timeout=10)
-                response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
+                if isinstance(content, BaseException):
+                    raise content
 
                 with open(target_path, 'wb') as f:  # Write in binary mode
-                    f.write(response.content)
+                    f.write(content)
                 logger.info(f"Successfully wrote input file to {target_path}")
 
-            except requests.exceptions.RequestException as req_err:
+            except httpx.HTTPError as req_err:
                 logger.error(
-                    f"Error fetching input file {filename} from {url}: {req_err}")
+                    f"Error fetching input file {filename} from {absolute_url}: {req_err}")
                 result["stderr"] += f"\n[Error fetching input file '{filename}': {req_err}]"
                 # Decide if this should be a fatal error? For now, just log stderr.
             except IOError as io_err:
@@ -182,31 +284,14 @@ def execute_python_code(code: str, input_files: list = [], timeout: int = DEFAUL
                 result["stderr"] += f"\n[Unexpected error handling input file '{filename}']"
         # --- End Input File Handling ---
 
-        # Prepare and write the main script
-        script_filename = "script.py"
-        script_path = os.path.join(temp_dir_path, script_filename)
         # Path where plot is initially saved in the temp dir
         temp_plot_path = os.path.join(temp_dir_path, PLOT_FILENAME)
 
-        full_code = MATPLOTLIB_SETUP_CODE + code
-        with open(script_path, 'w', encoding='utf-8') as f:
-            f.write(full_code)
-
-        # Command to execute the script file within its directory
-        cmd = [sys.executable, script_filename]
         logger.info(
-            f"Executing code in subprocess within {temp_dir_path} with timeout {timeout}s.")
+            f"Executing code in pre-warmed worker within {temp_dir_path} with timeout {timeout}s.")
 
-        # Run the subprocess
-        process = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=timeout,
-            encoding='utf-8',
-            errors='replace',
-            cwd=temp_dir_path,
-        )
+        # Run the code in a worker that already paid interpreter start-up
+        process = get_worker_pool().run(code, temp_dir_path, timeout)
 
         result["stdout"] = process.stdout
         result["stderr"] = process.stderr
@@ -252,18 +337,14 @@ def execute_python_code(code: str, input_files: list = [], timeout: int = DEFAUL
                 # Plot wasn't successfully moved, so no URL
                 result["plot_url"] = None
 
-    except subprocess.TimeoutExpired:
+    except subprocess.TimeoutExpired as timeout_err:
         result["error"] = f"Code execution timed out after {timeout} seconds."
-        # Attempt to include any output captured before timeout
-        # Note: stdout/stderr might be None or partial in TimeoutExpired in some Python versions/cases
-        # process variable might not be defined if timeout happened during setup
-        captured_stdout = getattr(process, 'stdout', None)
-        captured_stderr = getattr(process, 'stderr', None)
-        if captured_stdout:
-            result["stdout"] = captured_stdout
-        if captured_stderr:
+        # Include any output captured before the worker was killed
+        if timeout_err.stdout:
+            result["stdout"] = timeout_err.stdout
+        if timeout_err.stderr:
             # Keep potential plot saved message
-            result["stderr"] = captured_stderr
+            result["stderr"] = timeout_err.stderr
         logger.warning(result["error"])
     except FileNotFoundError:
         result["error"] = f"Error: Python interpreter not found at {sys.executable}"
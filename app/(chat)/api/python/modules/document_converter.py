@@ -1,25 +1,449 @@
+import io
 import os
-import requests
+import codecs
+import httpx
+import hashlib
+import orjson
 import tempfile
 import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from urllib.parse import urlparse, urlunparse
 import re
 
+import fitz
+from langchain_core.documents import Document
 from langchain_community.document_loaders import (
-    PyMuPDFLoader, TextLoader, UnstructuredWordDocumentLoader,
+    TextLoader, UnstructuredWordDocumentLoader,
     UnstructuredPowerPointLoader, UnstructuredExcelLoader,
     UnstructuredMarkdownLoader, BSHTMLLoader
 )
 
+from .pdf_pages import extract_page_range
+from .tmpfs import ram_temp_dir
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Buffer size used when streaming downloads to disk
+DOWNLOAD_BUFFER_SIZE = 1024 * 1024
+
+# Downloads larger than this are rejected with 413
+MAX_DOWNLOAD_SIZE = int(os.environ.get(
+    "MAX_DOWNLOAD_SIZE", 256 * 1024 * 1024))
+
+# HTTP/2 multiplexes requests to the same host over one connection and
+# compresses headers; it needs the optional h2 package
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Shared client so repeat hosts reuse pooled keep-alive connections. httpx
+# advertises every Accept-Encoding it can decode (br needs the brotli extra)
+# and decompresses transparently while streaming.
+HTTP_POOL_SIZE = 64
+_CLIENT = httpx.Client(
+    headers={'User-Agent': 'Mozilla/5.0 (compatible; DeepResearchBot/1.0)'},
+    # A short connect timeout reaches the fallbacks sooner
+    timeout=httpx.Timeout(15.0, connect=5.0),
+    follow_redirects=True,
+    transport=httpx.HTTPTransport(
+        http2=HTTP2_AVAILABLE,
+        retries=2,  # Connection failures only
+        limits=httpx.Limits(max_connections=HTTP_POOL_SIZE,
+                            max_keepalive_connections=HTTP_POOL_SIZE // 2)))
+
+
+def _open_stream(url, headers=None):
+    """Send a streamed GET; the caller must close the response"""
+    return _CLIENT.send(_CLIENT.build_request("GET", url, headers=headers), stream=True)
+
+
+def _close_response(future):
+    """Done-callback releasing the response of a candidate that lost the race"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def _fetch_first_available(urls):
+    """GET all candidate URLs at once; return (url, response) of the first success, or None"""
+    executor = ThreadPoolExecutor(max_workers=len(urls))
+    futures = {executor.submit(_open_stream, url): url for url in urls}
+    winner = None
+    try:
+        for future in as_completed(futures):
+            candidate_url = futures[future]
+            try:
+                response = future.result()
+            except httpx.HTTPError as e:
+                logger.warning(
+                    f"Fallback fetch failed for {candidate_url}: {e}")
+                continue
+            if response.is_success:
+                winner = future
+                return candidate_url, response
+            logger.warning(
+                f"Fallback fetch failed for {candidate_url}: HTTP {response.status_code}")
+            response.close()
+        return None
+    finally:
+        # Don't wait for slower candidates; close whatever they return
+        executor.shutdown(wait=False, cancel_futures=True)
+        for future in futures:
+            if future is not winner:
+                future.add_done_callback(_close_response)
+
+
+# Leading bytes kept from each download to identify files without a usable extension
+SNIFF_SIZE = 4096
+
+
+def _sniff_extension(head):
+    """Guess a file type from its first bytes (None if unrecognised)"""
+    if head.startswith(b'%PDF-'):
+        return 'pdf'
+    start = head.lstrip()[:64].lower()
+    if start.startswith((b'<!doctype html', b'<html')):
+        return 'html'
+    # NUL bytes mean binary; anything else is treated as plain text
+    if head and b'\x00' not in head:
+        return 'txt'
+    return None
+
+
+_ARXIV_PDF_RE = re.compile(
+    r'(https?://arxiv\.org)/pdf/(.*?)(\.pdf)?$', re.IGNORECASE)
+
+# Converted documents are cached on disk by content hash, and by URL + ETag;
+# each URL's last validators are kept in a subdirectory, for conditional requests
+_MODULE_DIR = os.path.dirname(__file__)
+_PROJECT_ROOT = os.path.abspath(os.path.join(
+    _MODULE_DIR, "..", "..", "..", "..", ".."))
+DOCUMENT_CACHE_DIR = os.environ.get(
+    "DOCUMENT_CACHE_DIR", os.path.join(_PROJECT_ROOT, "data", "document-cache"))
+DOCUMENT_CACHE_MAX_ENTRIES = int(
+    os.environ.get("DOCUMENT_CACHE_MAX_ENTRIES", 2000))
+VALIDATOR_CACHE_DIR = os.path.join(DOCUMENT_CACHE_DIR, "validators")
+
+# Entries written per cache directory since it was last counted; the directory
+# is only scanned when this estimate crosses the bound, and pruning then goes
+# down to this fraction of it so the next scan is many writes away
+_cache_counts = {}
+_cache_count_lock = threading.Lock()
+_PRUNE_TO = 0.9
+
+# PDFs with at least this many pages are parsed across several processes
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", 20))
+
+# Extraction stops after this many pages (0 means no limit)
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", 0))
+
+# Processes used by convert_document_batch, each converting one document at a time
+CONVERT_BATCH_WORKERS = int(os.environ.get(
+    "CONVERT_BATCH_WORKERS", min(os.cpu_count() or 1, 8)))
+
+# Processes shared by all large PDFs for parsing their page ranges
+PDF_PARSE_WORKERS = int(os.environ.get(
+    "PDF_PARSE_WORKERS", os.cpu_count() or 1))
+
+_page_pool = None
+_page_pool_lock = threading.Lock()
+
+# Set in batch worker processes, which already parse one document per core
+_in_batch_worker = False
+
+
+def _get_page_pool():
+    """Process pool shared by all parallel PDF parses, started on first use"""
+    global _page_pool
+    if _page_pool is None:
+        with _page_pool_lock:
+            if _page_pool is None:
+                # Spawned like the batch pool: forking this multithreaded
+                # server could leave a child waiting on an inherited lock
+                _page_pool = ProcessPoolExecutor(
+                    max_workers=PDF_PARSE_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"))
+    return _page_pool
+
+
+def _reset_page_pool(pool):
+    """Drop a broken page pool so the next large PDF starts a fresh one"""
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is pool:
+            _page_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _load_pdf(path, max_pages=None):
+    """Extract a PDF's text straight from MuPDF, returning (text, title, page_count)"""
+    buffer = io.StringIO()
+
+    def append(text):
+        # Pages are separated by a blank line; empty pages are skipped
+        if text:
+            if buffer.tell():
+                buffer.write("\n\n")
+            buffer.write(text)
+
+    with fitz.open(path) as doc:
+        page_count = doc.page_count
+        title = (doc.metadata or {}).get('title') or ''
+        pages = min(page_count, max_pages) if max_pages else page_count
+        workers = min(pages, PDF_PARSE_WORKERS)
+        if pages < PDF_PARALLEL_MIN_PAGES or workers < 2 or _in_batch_worker:
+            for i in range(pages):
+                append(doc[i].get_text("text"))
+            return buffer.getvalue(), title, page_count
+
+    # One contiguous page range per worker so each opens the file only once
+    step = -(-pages // workers)
+    starts = list(range(0, pages, step))
+    stops = [min(start + step, pages) for start in starts]
+    logger.info(f"Parsing {pages} PDF pages across {len(starts)} processes")
+    pool = _get_page_pool()
+    try:
+        for page_texts in pool.map(
+                extract_page_range, [path] * len(starts), starts, stops):
+            for text in page_texts:
+                append(text)
+    except BrokenProcessPool as e:
+        logger.warning(f"PDF page workers failed, parsing in-process: {str(e)}")
+        _reset_page_pool(pool)
+        buffer.seek(0)
+        buffer.truncate()
+        with fitz.open(path) as doc:
+            for i in range(pages):
+                append(doc[i].get_text("text"))
+    return buffer.getvalue(), title, page_count
+
+
+_HEADER_CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([^"\';\s]+)', re.IGNORECASE)
+_META_CHARSET_RE = re.compile(
+    rb'<meta[^>]+charset\s*=\s*["\']?\s*([-\w.:]+)', re.IGNORECASE)
+_BOMS = ((codecs.BOM_UTF8, 'utf-8-sig'),
+         (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+
+
+def _known_encoding(name):
+    """Python codec name for a declared charset (None if unknown)"""
+    try:
+        return codecs.lookup(name.decode('ascii') if isinstance(name, bytes) else name).name
+    except (LookupError, UnicodeDecodeError):
+        return None
+
+
+def _html_encoding(raw, content_type=None):
+    """Encoding of an HTML page, in the browser's order: BOM, Content-Type, <meta>, then guessed"""
+    for bom, encoding in _BOMS:
+        if raw.startswith(bom):
+            return encoding
+    match = content_type and _HEADER_CHARSET_RE.search(content_type)
+    encoding = match and _known_encoding(match.group(1))
+    if encoding:
+        return encoding
+    match = _META_CHARSET_RE.search(raw, 0, SNIFF_SIZE)
+    encoding = match and _known_encoding(match.group(1))
+    if encoding:
+        return encoding
+    # Undeclared: UTF-8 if the bytes are valid UTF-8, else the web's legacy default
+    try:
+        raw.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp1252'
+
+
+class FastHTMLLoader:
+    """HTML text loader built on selectolax's lexbor C parser (far faster than BeautifulSoup)"""
+
+    def __init__(self, file_path, encoding=None, content_type=None):
+        self.file_path = file_path
+        # Without a fixed encoding the page's declared charset is used
+        self.encoding = encoding
+        self.content_type = content_type
+
+    def load(self):
+        """Return the visible text of the page as a single Document"""
+        with open(self.file_path, 'rb') as f:
+            raw = f.read()
+        encoding = self.encoding or _html_encoding(raw, self.content_type)
+        tree = LexborHTMLParser(raw.decode(encoding, errors='replace'))
+        title_node = tree.css_first('title')
+        title = title_node.text(strip=True) if title_node else ""
+        # Drop nodes whose text is never rendered
+        tree.strip_tags(['script', 'style', 'noscript', 'template'])
+        root = tree.body or tree.root
+        text = root.text(separator=' ', strip=True).strip() if root else ""
+        return [Document(page_content=text,
+                         metadata={"source": self.file_path, "title": title})]
+
+
+# BeautifulSoup remains the fallback when selectolax is not installed
+HTML_LOADER = FastHTMLLoader if SELECTOLAX_AVAILABLE else BSHTMLLoader
+
+
+def _validator_key(url, headers):
+    """Cache key from the URL and its ETag/Last-Modified (None if the server sends neither)"""
+    validator = headers.get('ETag') or headers.get('Last-Modified')
+    if not validator:
+        return None
+    return hashlib.sha256(f"{url}\n{validator}".encode('utf-8')).hexdigest()
+
+
+def _url_key(url):
+    """Cache key of the validators last seen for a URL"""
+    return hashlib.sha256(f"url\n{url}".encode('utf-8')).hexdigest()
+
+
+def _conditional_headers(known):
+    """If-None-Match/If-Modified-Since from a URL's remembered validators"""
+    headers = {}
+    if known.get("etag"):
+        headers['If-None-Match'] = known["etag"]
+    if known.get("last_modified"):
+        headers['If-Modified-Since'] = known["last_modified"]
+    return headers
+
+
+def _remember_validators(url, headers):
+    """Record a URL's validators so the next fetch can be a conditional GET"""
+    etag, last_modified = headers.get('ETag'), headers.get('Last-Modified')
+    if not (etag or last_modified):
+        return
+    try:
+        os.makedirs(VALIDATOR_CACHE_DIR, exist_ok=True)
+        path = _cache_path(_url_key(url), VALIDATOR_CACHE_DIR)
+        added = not os.path.exists(path)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps({
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_type": headers.get('Content-Type'),
+            }))
+        os.replace(tmp_path, path)
+        _count_cache_writes(VALIDATOR_CACHE_DIR, added)
+    except OSError as e:
+        logger.warning(f"Failed to record validators for {url}: {str(e)}")
+
+
+def _cache_path(key, directory=None):
+    return os.path.join(directory or DOCUMENT_CACHE_DIR, f"{key}.json")
+
+
+def _cache_get(key, directory=None):
+    """Load a cached conversion and mark it recently used (None on a miss)"""
+    path = _cache_path(key, directory)
+    try:
+        with open(path, 'rb') as f:
+            entry = orjson.loads(f.read())
+        os.utime(path)
+        return entry
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+
+def _cache_put(content_key, validator_key, entry):
+    """Store a conversion under its content hash, hardlinked under the URL validator"""
+    try:
+        os.makedirs(DOCUMENT_CACHE_DIR, exist_ok=True)
+        path = _cache_path(content_key)
+        added = not os.path.exists(path)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps(entry))
+        os.replace(tmp_path, path)
+        if validator_key:
+            added += _link_validator(content_key, validator_key)
+        _count_cache_writes(DOCUMENT_CACHE_DIR, added)
+    except OSError as e:
+        logger.warning(f"Failed to write document cache entry: {str(e)}")
+
+
+def _link_validator(content_key, validator_key):
+    """Point the URL validator key at an existing content entry, returning 1 if it is a new entry"""
+    path = _cache_path(validator_key)
+    try:
+        added = not os.path.exists(path)
+        link_tmp = f"{path}.{os.getpid()}.tmp"
+        os.link(_cache_path(content_key), link_tmp)
+        os.replace(link_tmp, path)
+        return int(added)
+    except OSError as e:
+        logger.warning(f"Failed to link document cache entry: {str(e)}")
+        return 0
+
+
+def _count_cache_writes(directory, added):
+    """Track new entries in a cache directory, pruning it once it outgrows DOCUMENT_CACHE_MAX_ENTRIES"""
+    with _cache_count_lock:
+        count = _cache_counts.get(directory)
+        # Counted from disk on first use, so entries left by earlier runs
+        # (or other worker processes) are included
+        count = _prune_cache(directory, DOCUMENT_CACHE_MAX_ENTRIES) if count is None \
+            else count + added
+        if count > DOCUMENT_CACHE_MAX_ENTRIES:
+            count = _prune_cache(directory, int(DOCUMENT_CACHE_MAX_ENTRIES * _PRUNE_TO))
+        _cache_counts[directory] = count
+
+
+def _prune_cache(directory, keep):
+    """Drop the least recently used entries of a cache directory beyond keep, returning how many remain"""
+    entries = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith('.json'):
+            try:
+                if entry.is_file():
+                    entries.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                # Pruned meanwhile by another worker process
+                continue
+    if len(entries) <= keep:
+        return len(entries)
+    entries.sort()
+    for _, path in entries[:len(entries) - keep]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    return keep
+
+
+def _build_result(url, response, entry, content_type=None):
+    """Shape a (possibly cached) conversion into the endpoint's response"""
+    title = entry["title"]
+    if not title:
+        title = os.path.basename(urlparse(url).path)
+        title = os.path.splitext(title)[0]
+    return {
+        "text": entry["text"],  # Could be empty
+        "title": title,
+        "metadata": {
+            "source": url,
+            "extension": entry["extension"],
+            "page_count": entry["page_count"],
+            "content_type": content_type or response.headers.get('Content-Type'),
+        }
+    }
+
+
 # Map extensions to loaders
 LOADER_MAP = {
     "txt": TextLoader,
     "md": UnstructuredMarkdownLoader,
-    "html": BSHTMLLoader,
-    "htm": BSHTMLLoader,
-    "pdf": PyMuPDFLoader,
+    "html": HTML_LOADER,
+    "htm": HTML_LOADER,
     "doc": UnstructuredWordDocumentLoader,
     "docx": UnstructuredWordDocumentLoader,
     "pptx": UnstructuredPowerPointLoader,
@@ -30,59 +454,139 @@ LOADER_MAP = {
 }
 
 
+def _load_with_loader(url, extension, temp_file_path, content_type=None):
+    """Load a downloaded file with its LangChain loader, returning (text, title, page_count)
+
+    Returns None when the loader cannot be initialized.
+    """
+    # Initialize Loader based on extension
+    loader_class = LOADER_MAP.get(extension)
+    loader_instance = None
+
+    if not loader_class:
+        logger.warning(
+            f"Unsupported file type '{extension}'. Attempting to load as plain text.")
+        # TextLoader constructor takes file_path and encoding
+        # It does NOT take an 'errors' argument here.
+        loader_instance = TextLoader(temp_file_path, encoding='utf-8')
+    else:
+        logger.info(f"Using loader: {loader_class.__name__}")
+        try:
+            # Initialize the loader without the 'errors' argument
+            # Specific loaders might have other relevant args (e.g., encoding)
+            if loader_class is FastHTMLLoader:
+                # Decoded with the page's declared charset rather than UTF-8
+                loader_instance = FastHTMLLoader(
+                    temp_file_path, content_type=content_type)
+            elif loader_class in [TextLoader, HTML_LOADER, UnstructuredMarkdownLoader]:
+                loader_instance = loader_class(
+                    temp_file_path, encoding='utf-8')
+            else:
+                # Most loaders just take the file path
+                loader_instance = loader_class(temp_file_path)
+        except Exception as init_error:
+            logger.error(
+                f"Failed to initialize loader {loader_class.__name__} for {url}: {str(init_error)}")
+            return None
+
+    # Load and Extract Document Content
+    docs = []
+    content = ""
+    try:
+        # The .load() method itself might handle errors internally for some loaders
+        # We don't pass 'errors' here either.
+        docs = loader_instance.load()
+
+        # Filter out potential None values or empty strings from page_content
+        content = "\n\n".join(
+            [doc.page_content for doc in docs if doc and hasattr(
+                doc, 'page_content') and doc.page_content]
+        )
+
+    except Exception as load_error:
+        # Log error during loading but try to continue if possible
+        logger.warning(
+            f"Error during document load for {url} with {loader_instance.__class__.__name__}: {str(load_error)}")
+        # Content will remain empty or partially filled if load partially succeeded before error
+
+    # Extract Title
+    title = None
+    if docs and hasattr(docs[0], 'metadata') and 'title' in docs[0].metadata:
+        title = docs[0].metadata.get('title')
+
+    return content, title, len(docs)
+
+
 def convert_document_from_url(url):
     """Convert document from URL to text"""
     if not url:
         return {"error": "URL parameter is required"}, 400
 
     temp_file_path = None
+    response = None
     try:
         logger.info(f"Processing document URL: {url}")
 
         # --- Resilient Fetch Logic --- #
-        response = None
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (compatible; DeepResearchBot/1.0)'}
         primary_url = url
         try:
-            logger.info(f"Attempting primary fetch: {primary_url}")
-            response = requests.get(
-                primary_url, headers=headers, stream=True, timeout=15)
+            # A URL fetched before is requested conditionally: an unchanged
+            # document answers 304 with no body and is served from the cache
+            known = _cache_get(_url_key(primary_url), VALIDATOR_CACHE_DIR)
+            if known:
+                logger.info(f"Attempting conditional fetch: {primary_url}")
+                response = _open_stream(primary_url, _conditional_headers(known))
+                if response.status_code == 304:
+                    cached = _cache_get(_validator_key(primary_url, {
+                        'ETag': known.get("etag"), 'Last-Modified': known.get("last_modified")}))
+                    if cached:
+                        logger.info(
+                            f"Document cache hit for {primary_url} (not modified)")
+                        return _build_result(primary_url, response, cached, known.get("content_type"))
+                    # The cache entry was pruned meanwhile: fetch the body after all
+                    response.close()
+                    response = None
+            if response is None:
+                logger.info(f"Attempting primary fetch: {primary_url}")
+                response = _open_stream(primary_url)
             response.raise_for_status()
-        except requests.exceptions.RequestException as primary_error:
+        except httpx.HTTPError as primary_error:
             logger.warning(
                 f"Primary fetch failed for {primary_url}: {primary_error}")
+            # Release the failed stream so a fallback to the same host reuses its connection
+            if response is not None:
+                response.close()
             # Attempt fallback for arXiv PDF links
-            arxiv_pdf_match = re.match(
-                r'(https?://arxiv\.org)/pdf/(.*?)(\.pdf)?$', primary_url, re.IGNORECASE)
+            arxiv_pdf_match = _ARXIV_PDF_RE.match(primary_url)
             if arxiv_pdf_match:
                 base_url, paper_id, _ = arxiv_pdf_match.groups()
                 # Try common HTML mirror patterns (ar5iv, openalex-like often use /html/)
                 fallback_urls = [
                     f"{base_url}/html/{paper_id}",  # Common pattern
-                    # Add other known mirror patterns if needed
-                    # f"https://ar5iv.org/abs/{paper_id}" # Example if different domain
+                    f"https://ar5iv.labs.arxiv.org/html/{paper_id}",
                 ]
-                for fallback_url in fallback_urls:
-                    try:
-                        logger.info(
-                            f"Attempting fallback fetch: {fallback_url}")
-                        response = requests.get(
-                            fallback_url, headers=headers, stream=True, timeout=15)
-                        response.raise_for_status()
-                        logger.info(
-                            f"Fallback fetch successful for: {fallback_url}")
-                        url = fallback_url  # Update the URL if fallback succeeded
-                        break  # Stop trying fallbacks
-                    except requests.exceptions.RequestException as fallback_error:
-                        logger.warning(
-                            f"Fallback fetch failed for {fallback_url}: {fallback_error}")
-                if not response or not response.ok:
+                # Probe all mirrors at once: latency is the fastest mirror, not the sum
+                logger.info(
+                    f"Attempting fallback fetches: {', '.join(fallback_urls)}")
+                fallback = _fetch_first_available(fallback_urls)
+                if fallback is None:
                     raise primary_error  # Re-raise original error if all fallbacks fail
+                url, response = fallback  # Update the URL since the fallback succeeded
+                logger.info(f"Fallback fetch successful for: {url}")
             else:
                 raise primary_error  # Re-raise if not arXiv or no fallback succeeded
         # --- End Resilient Fetch Logic --- #
 
+        # Reject oversized documents before reading the body
+        try:
+            content_length = int(response.headers.get('Content-Length', 0))
+        except ValueError:
+            content_length = 0
+        if content_length > MAX_DOWNLOAD_SIZE:
+            logger.warning(
+                f"Rejecting {url}: Content-Length {content_length} exceeds {MAX_DOWNLOAD_SIZE} bytes")
+            return {"error": f"Document exceeds the maximum download size of {MAX_DOWNLOAD_SIZE} bytes"}, 413
+
         # Determine file extension from URL or Content-Type
         parsed_url = urlparse(url)
         clean_path_url = urlunparse(parsed_url._replace(query='', fragment=''))
@@ -100,100 +604,119 @@ def convert_document_from_url(url):
             }
             extension = mime_map.get(content_type)
 
-        if not extension:
-            return {
-                "error": f"Could not determine file type for URL: {url}"
-            }, 400
+        if extension:
+            logger.info(f"Determined file extension: {extension}")
+        else:
+            logger.info(
+                f"No file type in URL or Content-Type for {url}, sniffing the content")
 
-        logger.info(f"Determined file extension: {extension}")
+        # An unchanged URL (same ETag/Last-Modified) skips the download entirely
+        validator_key = _validator_key(url, response.headers)
+        cached = _cache_get(validator_key) if validator_key else None
+        if cached and cached.get("extension") == extension:
+            logger.info(f"Document cache hit for {url} (validator)")
+            _remember_validators(url, response.headers)
+            return _build_result(url, response, cached)
 
-        # Create temporary file with appropriate extension
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{extension}') as tmp_file:
-            for chunk in response.iter_content(chunk_size=8192):
-                tmp_file.write(chunk)
+        # Create temporary file with appropriate extension, in RAM when it fits.
+        # One pass over the body writes it, hashes it and keeps its first bytes.
+        written = 0
+        hasher = hashlib.sha256()
+        head = b""
+        with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{extension}' if extension else '',
+                                         dir=ram_temp_dir(content_length)) as tmp_file:
             temp_file_path = tmp_file.name
+            # Count bytes as they stream in; Content-Length may be absent or wrong
+            for chunk in response.iter_bytes(DOWNLOAD_BUFFER_SIZE):
+                written += len(chunk)
+                if written > MAX_DOWNLOAD_SIZE:
+                    break
+                hasher.update(chunk)
+                tmp_file.write(chunk)
+                if len(head) < SNIFF_SIZE:
+                    head += chunk[:SNIFF_SIZE - len(head)]
 
-        # 2. Initialize Loader based on extension
-        loader_class = LOADER_MAP.get(extension)
-        loader_instance = None
-
-        if not loader_class:
+        if written > MAX_DOWNLOAD_SIZE:
             logger.warning(
-                f"Unsupported file type '{extension}'. Attempting to load as plain text.")
-            # TextLoader constructor takes file_path and encoding
-            # It does NOT take an 'errors' argument here.
-            loader_instance = TextLoader(temp_file_path, encoding='utf-8')
-        else:
-            logger.info(f"Using loader: {loader_class.__name__}")
+                f"Aborted download of {url} after {MAX_DOWNLOAD_SIZE} bytes")
+            return {"error": f"Document exceeds the maximum download size of {MAX_DOWNLOAD_SIZE} bytes"}, 413
+
+        if not extension:
+            extension = _sniff_extension(head)
+            if not extension:
+                return {
+                    "error": f"Could not determine file type for URL: {url}"
+                }, 400
+            logger.info(f"Sniffed file extension: {extension}")
+            # Loaders may dispatch on the file suffix
+            sniffed_path = f"{temp_file_path}.{extension}"
+            os.rename(temp_file_path, sniffed_path)
+            temp_file_path = sniffed_path
+
+        # Identical bytes were converted before (possibly from another URL)
+        content_key = f"{hasher.hexdigest()}-{extension}"
+        cached = _cache_get(content_key)
+        if cached:
+            logger.info(f"Document cache hit for {url} (content hash)")
+            if validator_key:
+                try:
+                    _count_cache_writes(
+                        DOCUMENT_CACHE_DIR, _link_validator(content_key, validator_key))
+                except OSError as e:
+                    # Bookkeeping only: the cached conversion is still served
+                    logger.warning(f"Failed to update document cache for {url}: {str(e)}")
+                _remember_validators(url, response.headers)
+            return _build_result(url, response, cached)
+
+        # 2. Extract the text; PDFs skip the per-page Document round trip
+        if extension == "pdf":
             try:
-                # Initialize the loader without the 'errors' argument
-                # Specific loaders might have other relevant args (e.g., encoding)
-                if loader_class in [TextLoader, BSHTMLLoader, UnstructuredMarkdownLoader]:
-                    loader_instance = loader_class(
-                        temp_file_path, encoding='utf-8')
-                else:
-                    # Most loaders just take the file path
-                    loader_instance = loader_class(temp_file_path)
-            except Exception as init_error:
-                logger.error(
-                    f"Failed to initialize loader {loader_class.__name__} for {url}: {str(init_error)}")
+                content, title, page_count = _load_pdf(
+                    temp_file_path, PDF_MAX_PAGES)
+            except Exception as load_error:
+                logger.warning(
+                    f"Error during PDF load for {url}: {str(load_error)}")
+                content, title, page_count = "", None, 0
+        else:
+            loaded = _load_with_loader(
+                url, extension, temp_file_path, response.headers.get('Content-Type'))
+            if loaded is None:
                 return {"error": f"Failed to initialize document loader for file type {extension}"}, 500
-
-        # 3. Load and Extract Document Content
-        docs = []
-        content = ""
-        try:
-            # The .load() method itself might handle errors internally for some loaders
-            # We don't pass 'errors' here either.
-            docs = loader_instance.load()
-
-            # Filter out potential None values or empty strings from page_content
-            content = "\n\n".join(
-                [doc.page_content for doc in docs if doc and hasattr(
-                    doc, 'page_content') and doc.page_content]
-            )
-
-        except Exception as load_error:
-            # Log error during loading but try to continue if possible
-            logger.warning(
-                f"Error during document load for {url} with {loader_instance.__class__.__name__}: {str(load_error)}")
-            # Content will remain empty or partially filled if load partially succeeded before error
+            content, title, page_count = loaded
 
         if not content:
             logger.warning(
-                f"No text content extracted from {url} using {loader_instance.__class__.__name__}. It might be an image-only document or load failed.")
+                f"No text content extracted from {url}. It might be an image-only document or load failed.")
             # Return success but with empty text
 
-        # 4. Extract Title (remains the same)
-        title = None
-        if docs and hasattr(docs[0], 'metadata') and 'title' in docs[0].metadata:
-            title = docs[0].metadata.get('title')
-        if not title:
-            title = os.path.basename(urlparse(url).path)
-            title = os.path.splitext(title)[0]
-
         logger.info(
             f"Finished processing document. Extracted {len(content)} characters.")
 
-        # 5. Return Result
-        return {
-            "text": content,  # Could be empty
+        entry = {
+            "text": content,
             "title": title,
-            "metadata": {
-                "source": url,
-                "extension": extension,
-                "page_count": len(docs) if docs else 0,
-                "content_type": response.headers.get('Content-Type'),
-            }
+            "extension": extension,
+            "page_count": page_count,
         }
+        # Empty output may be a failed load; let the next request retry it
+        if content:
+            _cache_put(content_key, validator_key, entry)
+            if validator_key:
+                _remember_validators(url, response.headers)
+
+        # 3. Return Result
+        return _build_result(url, response, entry)
 
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Failed to download URL {url}: {str(e)}")
         return {"error": f"Failed to download URL {url}: {str(e)}"}, 500
     except Exception as e:
         logger.error(f"Failed to process document from {url}: {str(e)}")
         return {"error": f"Failed to process document from {url}: {str(e)}"}, 500
     finally:
+        # Hand the connection back to the client's pool
+        if response is not None:
+            response.close()
         # Clean up temp file (remains the same)
         if temp_file_path and os.path.exists(temp_file_path):
             try:
@@ -202,3 +725,75 @@ def convert_document_from_url(url):
             except Exception as e:
                 logger.warning(
                     f"Failed to remove temporary file {temp_file_path}: {str(e)}")
+
+
+_batch_pool = None
+_batch_pool_lock = threading.Lock()
+
+
+def _init_batch_worker():
+    """Configure a batch worker process once, before its first document"""
+    global _in_batch_worker
+    _in_batch_worker = True
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # Each worker already owns a core; libraries loaded later (e.g. the
+    # Unstructured inference models) must not start thread pools of their own
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = "1"
+
+
+def _convert_one(url):
+    """convert_document_from_url in a batch worker (module level so it pickles)"""
+    return convert_document_from_url(url)
+
+
+def _get_batch_pool():
+    """Process pool shared by all batch conversions, started on first use"""
+    global _batch_pool
+    if _batch_pool is None:
+        with _batch_pool_lock:
+            if _batch_pool is None:
+                # Spawned (not forked) workers get their own HTTP client and
+                # never inherit locks held by the server's threads
+                _batch_pool = ProcessPoolExecutor(
+                    max_workers=CONVERT_BATCH_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_batch_worker)
+    return _batch_pool
+
+
+def _reset_batch_pool(pool):
+    """Drop a broken pool so the next batch starts a fresh one"""
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is pool:
+            _batch_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def convert_document_batch(urls):
+    """Convert several URLs in parallel worker processes, returning results in input order
+
+    Each result has the same shape as convert_document_from_url's.
+    """
+    if len(urls) <= 1:
+        # Not worth the inter-process round trip
+        return [convert_document_from_url(url) for url in urls]
+    logger.info(
+        f"Converting {len(urls)} documents across {min(len(urls), CONVERT_BATCH_WORKERS)} processes")
+    pool = _get_batch_pool()
+    futures = [pool.submit(_convert_one, url) for url in urls]
+
+    # A failure (even a crashed worker) only costs the documents it affects
+    results = []
+    for url, future in zip(urls, futures):
+        try:
+            results.append(future.result())
+        except Exception as e:
+            logger.error(f"Batch conversion of {url} failed: {str(e)}")
+            results.append(
+                ({"error": f"Failed to process document from {url}: {str(e)}"}, 500))
+            if isinstance(e, BrokenProcessPool):
+                _reset_batch_pool(pool)
+    return results
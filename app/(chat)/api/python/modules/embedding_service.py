@@ -1,10 +1,49 @@
 import os
+import time
+import base64
+import queue
+import zlib
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
 import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
 
+from .onnx_backend import ONNX_AVAILABLE, OnnxSentenceEncoder
+
 logger = logging.getLogger(__name__)
 
+DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+
+# Micro-batching configuration; GPUs take much larger batches
+BATCH_SIZE = int(os.environ.get(
+    "EMBEDDING_BATCH_SIZE", 256 if DEVICE == "cuda" else 64))
+MAX_BATCH_REQUESTS = int(os.environ.get("EMBEDDING_MAX_BATCH_REQUESTS", 32))
+MAX_BATCH_WAIT = float(os.environ.get("EMBEDDING_MAX_BATCH_WAIT_MS", 5)) / 1000
+
+# "auto" uses int8 ONNX Runtime on CPU when optimum is installed, "onnx" forces
+# it (e.g. on a GPU host), "sentence-transformers" always uses PyTorch
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "auto")
+
+# Output formats accepted by generate_embeddings
+RETURN_FORMATS = ("list", "ndarray", "b64")
+
+# ~150 MB at 384 float16 dimensions
+CACHE_SIZE = int(os.environ.get("EMBEDDING_CACHE_SIZE", 100_000))
+
+
+def encode_b64(embeddings):
+    """JSON-safe float16 form of an embedding matrix; decode with np.frombuffer"""
+    half = embeddings.astype(np.float16)
+    return {
+        "shape": list(half.shape),
+        "dtype": "float16",
+        "data": base64.b64encode(half.tobytes()).decode('ascii')
+    }
+
 
 class EmbeddingService:
     def __init__(self):
@@ -12,15 +51,54 @@ class EmbeddingService:
         self.model_name = os.environ.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
         self.embedding_model = None
         self.model_dimensions = None
+        self.backend = None
         self._initialize_model()
 
+        # LRU of text hash -> float16 vector, shared by all request threads
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # Concurrent callers enqueue (token ids, batch_size, future); a single worker
+        # coalesces them into one encode call.
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(
+            target=self._batch_worker, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
     def _initialize_model(self):
         """Initialize the embedding model"""
         logger.info(f"Loading embedding model: {self.model_name}")
 
+        # The int8 ONNX model only pays off on CPU; GPUs run the FP16 PyTorch model
+        use_onnx = EMBEDDING_BACKEND == "onnx" or (
+            EMBEDDING_BACKEND == "auto" and DEVICE == "cpu")
+        if use_onnx and not ONNX_AVAILABLE:
+            if EMBEDDING_BACKEND == "onnx":
+                logger.warning(
+                    "EMBEDDING_BACKEND=onnx but optimum/onnxruntime are not installed")
+            use_onnx = False
+        if use_onnx:
+            try:
+                # int8 ONNX Runtime is considerably faster than FP32 PyTorch on CPU
+                self.embedding_model = OnnxSentenceEncoder(self.model_name)
+                self.model_dimensions = self.embedding_model.get_sentence_embedding_dimension()
+                self.backend = "onnx"
+                logger.info(
+                    f"Model loaded with ONNX Runtime (int8): {self.model_name}, dimensions: {self.model_dimensions}")
+                return
+            except Exception as e:
+                logger.warning(
+                    f"ONNX Runtime load failed, falling back to SentenceTransformer: {str(e)}")
+
         try:
-            self.embedding_model = SentenceTransformer(self.model_name)
-            logger.info(f"Model loaded successfully: {self.model_name}")
+            self.embedding_model = SentenceTransformer(
+                self.model_name, device=DEVICE)
+            if DEVICE == "cuda":
+                # FP16 tensor-core GEMMs; similarity drift is negligible
+                self.embedding_model.half()
+            self.backend = "sentence-transformers"
+            logger.info(
+                f"Model loaded successfully: {self.model_name} on {DEVICE}")
             self.model_dimensions = self.embedding_model.get_sentence_embedding_dimension()
             logger.info(f"Model dimensions: {self.model_dimensions}")
         except Exception as e:
@@ -28,6 +106,7 @@ class EmbeddingService:
             # Create a dummy model for development if the real model fails to load
             self.embedding_model = self._create_dummy_model()
             logger.warning("Using dummy embedding model for development")
+            self.backend = "dummy"
             self.model_dimensions = self.embedding_model.get_sentence_embedding_dimension()
 
     def _create_dummy_model(self):
@@ -35,37 +114,195 @@ class EmbeddingService:
         class DummyModel:
             def __init__(self):
                 self.dimension = 384  # Typical dimension for smaller models
+                # Drawn once so encode() costs no RNG time
+                self._rand = np.random.default_rng(0).standard_normal(
+                    (4096, self.dimension), dtype=np.float32)
 
             def encode(self, texts, **kwargs):
-                # Return random vectors for development purposes
-                return np.random.randn(len(texts), self.dimension)
+                # Random-looking vectors picked by a stable hash of the text, so
+                # the same text always gets the same vector across calls and runs
+                rows = np.fromiter((zlib.crc32(t.encode('utf-8')) for t in texts),
+                                   dtype=np.int64, count=len(texts)) % len(self._rand)
+                return self._rand[rows]
 
             def get_sentence_embedding_dimension(self):
                 return self.dimension
 
         return DummyModel()
 
-    def generate_embeddings(self, texts):
-        """Generate embeddings for a list of texts"""
+    def _tokenize(self, texts):
+        """Token ids of each text from one batched tokenizer call (None without a tokenizer)"""
+        tokenizer = getattr(self.embedding_model, 'tokenizer', None)
+        if tokenizer is None:
+            return None
+        return tokenizer(list(texts), truncation=True,
+                         max_length=self.embedding_model.max_seq_length)['input_ids']
+
+    def _forward(self, features):
+        """Run the model on one padded batch and return sentence embeddings"""
+        if self.backend == "onnx":
+            return self.embedding_model.embed_features(features)
+        features = {name: value.to(DEVICE) for name, value in features.items()}
+        with torch.inference_mode():
+            output = self.embedding_model.forward(features)['sentence_embedding']
+        return output.float().cpu().numpy()
+
+    def _encode(self, items, batch_size=BATCH_SIZE):
+        """Encode token id lists (or raw texts) sorted by length so each batch carries minimal padding"""
+        if items and isinstance(items[0], str):
+            # No tokenizer (dummy model): the model handles raw texts itself
+            embeddings = np.array(self.embedding_model.encode(
+                items, batch_size=batch_size, convert_to_numpy=True,
+                normalize_embeddings=True, show_progress_bar=False), dtype=np.float32)
+        else:
+            tokenizer = self.embedding_model.tokenizer
+            tensor_type = 'np' if self.backend == "onnx" else 'pt'
+            order = np.argsort([len(ids) for ids in items], kind='stable')
+            embeddings = np.empty((len(items), self.model_dimensions), dtype=np.float32)
+            for start in range(0, len(items), batch_size):
+                batch = order[start:start + batch_size]
+                # Pad the already tokenized ids instead of tokenizing the texts again
+                features = tokenizer.pad(
+                    {'input_ids': [items[i] for i in batch]}, return_tensors=tensor_type)
+                embeddings[batch] = self._forward(dict(features))
+
+        # Unit length for every backend, so callers get cosine similarity from a
+        # dot product; row norms via einsum, without np.linalg.norm's temporaries
+        norms = np.sqrt(np.einsum('ij,ij->i', embeddings, embeddings))
+        np.maximum(norms, 1e-12, out=norms)
+        embeddings /= norms[:, None]
+        return embeddings
+
+    def _batch_worker(self):
+        """Drain queued requests and serve them with a single encode call"""
+        while True:
+            pending = [self._queue.get()]
+            deadline = time.monotonic() + MAX_BATCH_WAIT
+            while len(pending) < MAX_BATCH_REQUESTS:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            all_items = [item for items, _, _ in pending for item in items]
+            # Honour the largest batch size any coalesced caller asked for
+            batch_size = max(size or BATCH_SIZE for _, size, _ in pending)
+            try:
+                embeddings = self._encode(all_items, batch_size)
+            except Exception as e:
+                for _, _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            if len(pending) > 1:
+                logger.info(
+                    f"Coalesced {len(pending)} embedding requests into one batch of {len(all_items)} texts")
+
+            offset = 0
+            for items, _, future in pending:
+                future.set_result(embeddings[offset:offset + len(items)])
+                offset += len(items)
+
+    @staticmethod
+    def _cache_key(item):
+        """Stable 128-bit digest of a token id list (or a raw text)"""
+        if isinstance(item, str):
+            data = item.encode('utf-8')
+        else:
+            data = np.asarray(item, dtype=np.int32).tobytes()
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def generate_embeddings_np(self, texts, batch_size=None):
+        """Embed texts as a float32 array of unit vectors, encoding only cache misses"""
         if not texts:
-            return []
+            # The tokenizer rejects an empty batch
+            return np.empty((0, self.model_dimensions), dtype=np.float32)
+        # Texts are tokenized once here; the ids key the cache, so texts that
+        # tokenize identically share an entry, and are what the worker encodes
+        items = self._tokenize(texts) or texts
+        keys = [self._cache_key(item) for item in items]
+        embeddings = np.empty((len(texts), self.model_dimensions), dtype=np.float32)
+
+        # First index of every distinct text that is not cached yet
+        misses = {}
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    embeddings[i] = cached
+                elif key not in misses:
+                    misses[key] = i
+
+        if misses:
+            # Hand off to the batching worker and wait for our slice
+            future = Future()
+            self._queue.put(
+                ([items[i] for i in misses.values()], batch_size, future))
+            # Rounded through float16 like the cached copies, so a text gets the
+            # same vector whether or not it was served from the cache
+            computed = dict(zip(misses, future.result().astype(np.float16)))
+
+            with self._cache_lock:
+                for key, vector in computed.items():
+                    self._cache[key] = vector
+                while len(self._cache) > CACHE_SIZE:
+                    self._cache.popitem(last=False)
+
+            for i, key in enumerate(keys):
+                if key in computed:
+                    embeddings[i] = computed[key]
+
+        logger.info(
+            f"Embedded {len(texts)} texts ({len(texts) - len(misses)} served from cache)")
+        return embeddings
+
+    def generate_embeddings(self, texts, batch_size=None, return_format="list"):
+        """Generate embeddings for a list of texts.
+
+        return_format is "list" (nested Python floats), "ndarray" (float32
+        array) or "b64" (base64 float16 bytes plus shape/dtype for JSON).
+        """
+        if return_format not in RETURN_FORMATS:
+            raise ValueError(
+                f"Invalid return_format '{return_format}', expected one of {RETURN_FORMATS}")
 
         try:
-            # Generate embeddings
-            embeddings = self.embedding_model.encode(texts).tolist()
+            embeddings = self.generate_embeddings_np(list(texts), batch_size)
             logger.info(f"Successfully generated {len(embeddings)} embeddings")
-            return embeddings
         except Exception as e:
             logger.error(f"Error generating embeddings: {str(e)}")
             raise
 
+        if return_format == "ndarray":
+            return embeddings
+        if return_format == "b64":
+            return encode_b64(embeddings)
+        return embeddings.tolist()
+
     def get_model_info(self):
         """Get information about the current embedding model"""
         return {
             "model": self.model_name,
-            "dimensions": self.model_dimensions
+            "dimensions": self.model_dimensions,
+            "backend": self.backend,
+            "device": DEVICE
         }
 
 
-# Create a singleton instance
-embedding_service = EmbeddingService()
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_embedding_service():
+    """Shared EmbeddingService, created (and its model loaded) on first use"""
+    global _instance
+    if _instance is None:
+        # Concurrent first callers wait here rather than loading the model twice
+        with _instance_lock:
+            if _instance is None:
+                _instance = EmbeddingService()
+    return _instance
@@ -0,0 +1,62 @@
+import asyncio
+import atexit
+import logging
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# One event loop for the whole process, running in a daemon thread. Request
+# threads submit coroutines to it instead of paying for asyncio.run's loop
+# setup/teardown, and clients or crawlers bound to it survive across requests.
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop():
+    """Shared background event loop, started on first use"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                # Follows the current event loop policy, so uvloop when installed
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever,
+                                 name="event-loop", daemon=True).start()
+                logger.info(f"Started shared event loop: {type(loop).__name__}")
+                _loop = loop
+                # Registered first, so it runs after the cleanups of anything
+                # (e.g. crawlers) that was started on the loop later
+                atexit.register(_stop_loop, loop)
+    return _loop
+
+
+def _stop_loop(loop):
+    """Cancel whatever is still running on the loop and stop it at interpreter exit"""
+    async def cancel_pending():
+        tasks = [task for task in asyncio.all_tasks()
+                 if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await loop.shutdown_asyncgens()
+
+    try:
+        asyncio.run_coroutine_threadsafe(cancel_pending(), loop).result(timeout=5)
+    except Exception as e:
+        logger.warning(f"Error stopping shared event loop: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def run_async(coro, timeout: float = None):
+    """Run a coroutine on the shared event loop from synchronous code and return its result
+
+    On timeout the coroutine is cancelled as well, since unlike asyncio.run
+    the loop outlives the caller and would otherwise keep it running.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+    try:
+        return future.result(timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise
@@ -0,0 +1,95 @@
+"""
+Pre-warmed interpreter for code execution.
+
+Started ahead of time by code_executor: it pays interpreter start-up and the
+heavy scientific imports while idle, then blocks on stdin. A job is the
+working directory on the first line followed by the user's code. The code
+runs as __main__ with stdout/stderr going straight to the parent, and the
+worker exits afterwards so no state leaks between executions.
+"""
+import sys
+import os
+import builtins
+import traceback
+
+PLOT_FILENAME = "plot.png"
+
+# --- Matplotlib Setup Code ---
+# Executed once while the worker is idle, in the namespace the user's code
+# later runs in, to configure Matplotlib and capture plots automatically.
+MATPLOTLIB_SETUP_CODE = f"""
+import sys
+import os
+# Ensure the backend is set *before* importing pyplot
+import matplotlib
+matplotlib.use('Agg') # Use non-interactive backend good for saving files
+import matplotlib.pyplot as plt
+
+# --- Auto-saving plot ---
+_original_show = plt.show
+_plot_saved = False
+
+def _save_and_show(*args, **kwargs):
+    global _plot_saved
+    if not _plot_saved: # Save only the first plot generated
+        try:
+            # Save the current figure to the predefined path in the CWD
+            plt.savefig('{PLOT_FILENAME}')
+            _plot_saved = True
+            print(f"[Plot saved to {PLOT_FILENAME}]", file=sys.stderr) # Info for debugging
+        except Exception as e:
+            print(f"Error saving plot: {{e}}", file=sys.stderr)
+    # We don't call the original show because we're in a non-GUI environment
+    # _original_show(*args, **kwargs)
+    plt.close() # Close the plot to free memory
+
+# Monkey-patch plt.show
+plt.show = _save_and_show
+
+# --- End Matplotlib Setup ---
+"""
+
+# Imported while idle so user code finds them in sys.modules
+PREIMPORT_MODULES = ("numpy", "pandas")
+
+SCRIPT_FILENAME = "script.py"
+
+
+def main():
+    for module_name in PREIMPORT_MODULES:
+        try:
+            __import__(module_name)
+        except ImportError:
+            pass
+
+    namespace = {"__name__": "__main__", "__builtins__": builtins}
+    exec(compile(MATPLOTLIB_SETUP_CODE, "<matplotlib-setup>", "exec"), namespace)
+
+    # Block until the parent hands over a job (EOF means the server went away)
+    cwd = sys.stdin.readline().rstrip("\n")
+    if not cwd:
+        return 0
+    code = sys.stdin.read()
+
+    os.chdir(cwd)
+    # Mirror `python script.py`: the script directory comes first on sys.path
+    sys.path[0] = cwd
+    script_path = os.path.join(cwd, SCRIPT_FILENAME)
+    namespace["__file__"] = script_path
+
+    try:
+        exec(compile(code, script_path, "exec"), namespace)
+    except SystemExit:
+        raise
+    except BaseException as e:
+        # Skip this frame so the traceback starts in the user's code
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        return 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
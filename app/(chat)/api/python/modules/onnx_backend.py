@@ -0,0 +1,162 @@
+import os
+import logging
+import platform
+import numpy as np
+
+try:
+    import onnxruntime as ort
+    from optimum.onnxruntime import (
+        ORTModelForFeatureExtraction, ORTModelForSequenceClassification, ORTQuantizer)
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoConfig, AutoTokenizer
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Exported/quantized models are cached next to the other persistent data
+_MODULE_DIR = os.path.dirname(__file__)
+_PROJECT_ROOT = os.path.abspath(os.path.join(
+    _MODULE_DIR, "..", "..", "..", "..", ".."))
+ONNX_CACHE_DIR = os.environ.get(
+    "ONNX_CACHE_DIR", os.path.join(_PROJECT_ROOT, "data", "onnx-models"))
+
+QUANTIZED_FILENAME = "model_quantized.onnx"
+
+
+def _hub_model_id(model_name: str) -> str:
+    """Resolve short SentenceTransformer names to their Hugging Face repo id"""
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+def export_quantized_model(model_name: str, model_class, trust_remote_code: bool = False) -> str:
+    """Export a model to ONNX with dynamic int8 quantization, reusing the cached copy if present"""
+    model_dir = os.path.join(ONNX_CACHE_DIR, model_name.replace("/", "--"))
+    quantized_path = os.path.join(model_dir, QUANTIZED_FILENAME)
+    if os.path.exists(quantized_path):
+        logger.info(f"Using cached quantized ONNX model: {quantized_path}")
+        return model_dir
+
+    model_id = _hub_model_id(model_name)
+    logger.info(f"Exporting {model_id} to ONNX (first run only)...")
+    model = model_class.from_pretrained(
+        model_id, export=True, trust_remote_code=trust_remote_code)
+    model.save_pretrained(model_dir)
+    AutoTokenizer.from_pretrained(
+        model_id, trust_remote_code=trust_remote_code).save_pretrained(model_dir)
+
+    quantizer = ORTQuantizer.from_pretrained(model)
+    # Dynamic quantization runs anywhere; the config picks the target's int8 kernels
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        quantization_config = AutoQuantizationConfig.arm64(
+            is_static=False, per_channel=False)
+    else:
+        quantization_config = AutoQuantizationConfig.avx512_vnni(
+            is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=model_dir,
+                       quantization_config=quantization_config)
+    logger.info(f"Saved int8 quantized ONNX model to {quantized_path}")
+    return model_dir
+
+
+def create_session(model_dir: str):
+    """Create an ONNX Runtime session with full graph optimizations"""
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    return ort.InferenceSession(
+        os.path.join(model_dir, QUANTIZED_FILENAME),
+        sess_options=options,
+        providers=["CPUExecutionProvider"])
+
+
+class OnnxSentenceEncoder:
+    """Drop-in replacement for SentenceTransformer.encode backed by an int8 ONNX model"""
+
+    def __init__(self, model_name: str, max_seq_length: int = 256):
+        model_dir = export_quantized_model(
+            model_name, ORTModelForFeatureExtraction)
+        self.session = create_session(model_dir)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_seq_length = max_seq_length
+        self.dimension = AutoConfig.from_pretrained(model_dir).hidden_size
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def embed_features(self, inputs):
+        """Run the ONNX session on tokenized inputs and mean-pool token embeddings"""
+        feed = {name: value.astype(np.int64)
+                for name, value in inputs.items() if name in self._input_names}
+        if 'token_type_ids' in self._input_names and 'token_type_ids' not in feed:
+            # Pre-tokenized ids are padded without segment ids; BERT exports
+            # still require them, and single sequences are all segment 0
+            feed['token_type_ids'] = np.zeros_like(feed['input_ids'])
+        token_embeddings = self.session.run(None, feed)[0]
+
+        # Mean pooling over non-padding tokens
+        mask = inputs['attention_mask'][..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        return (summed / np.clip(mask.sum(axis=1), 1e-9, None)).astype(np.float32)
+
+    def encode(self, texts, batch_size: int = 64, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = True, **kwargs):
+        """Tokenize, run the ONNX session and mean-pool token embeddings"""
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(
+                texts[start:start + batch_size],
+                padding='longest',
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors='np'
+            )
+            embeddings = self.embed_features(inputs)
+            if normalize_embeddings:
+                norms = np.sqrt(np.einsum('ij,ij->i', embeddings, embeddings))
+                np.maximum(norms, 1e-12, out=norms)
+                embeddings /= norms[:, None]
+            batches.append(embeddings)
+
+        if not batches:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return np.concatenate(batches)
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+
+class OnnxCrossEncoder:
+    """Drop-in replacement for CrossEncoder.predict backed by an int8 ONNX model"""
+
+    def __init__(self, model_name: str, max_length: int = 1024, trust_remote_code: bool = False):
+        model_dir = export_quantized_model(
+            model_name, ORTModelForSequenceClassification, trust_remote_code)
+        self.session = create_session(model_dir)
+        self.tokenizer = AutoTokenizer.from_pretrained(
+            model_dir, trust_remote_code=trust_remote_code)
+        self.max_length = max_length
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def predict(self, sentence_pairs, batch_size: int = 32, **kwargs):
+        """Score [query, document] pairs; single-logit models get a sigmoid like CrossEncoder"""
+        batches = []
+        for start in range(0, len(sentence_pairs), batch_size):
+            batch = sentence_pairs[start:start + batch_size]
+            inputs = self.tokenizer(
+                [pair[0] for pair in batch],
+                [pair[1] for pair in batch],
+                padding='longest',
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors='np'
+            )
+            feed = {name: value.astype(np.int64)
+                    for name, value in inputs.items() if name in self._input_names}
+            logits = self.session.run(None, feed)[0]
+            if logits.shape[1] == 1:
+                batches.append(1 / (1 + np.exp(-logits[:, 0])))
+            else:
+                batches.append(logits)
+
+        if not batches:
+            return np.empty(0, dtype=np.float32)
+        return np.concatenate(batches).astype(np.float32)
@@ -0,0 +1,11 @@
+import fitz
+
+# Entry point for the document converter's PDF page pool. It lives apart from
+# document_converter so spawned page workers only import MuPDF, not the HTTP
+# client and document loaders.
+
+
+def extract_page_range(path, start, stop):
+    """Extract the text of pages [start, stop) of a PDF (runs in a worker process)"""
+    with fitz.open(path) as doc:
+        return [doc[i].get_text("text") for i in range(start, stop)]
@@ -1,11 +1,22 @@
+import os
+import hashlib
 import logging
 import re
+import threading
+from collections import OrderedDict
 from typing import List, Tuple
+import numpy as np
 import fasttext
 from huggingface_hub import hf_hub_download
 
 logger = logging.getLogger(__name__)
 
+_NEWLINE_RE = re.compile("\n+")
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Scraped pages repeat the same snippets; scores are a few bytes each
+SCORE_CACHE_SIZE = int(os.environ.get("QUALITY_SCORE_CACHE_SIZE", 50_000))
+
 
 class QualityFilterService:
     def __init__(self):
@@ -19,6 +30,10 @@ class QualityFilterService:
         }
         self._initialize_model()
 
+        # LRU of model input hash -> score, shared by all request threads
+        self._score_cache = OrderedDict()
+        self._score_cache_lock = threading.Lock()
+
     def _initialize_model(self):
         """Initialize the quality filtering model from Hugging Face"""
         try:
@@ -37,7 +52,7 @@ class QualityFilterService:
 
     def _replace_newlines(self, text: str) -> str:
         """Replace newlines with spaces for model input"""
-        return re.sub("\n+", " ", text)
+        return _NEWLINE_RE.sub(" ", text)
 
     def predict_educational_value(self, text_list: List[str]) -> List[float]:
         """Predict educational value scores for a list of texts"""
@@ -46,19 +61,51 @@ class QualityFilterService:
                 "Quality model not loaded, returning default score 0.")
             return [0.0] * len(text_list)
 
+        if not text_list:
+            return []
+
         processed_texts = [self._replace_newlines(text) for text in text_list]
+        keys = [hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+                for text in processed_texts]
+        results = [0.0] * len(text_list)
+
+        # First index of every distinct text that is not cached yet
+        misses = {}
+        with self._score_cache_lock:
+            for i, key in enumerate(keys):
+                cached = self._score_cache.get(key)
+                if cached is not None:
+                    self._score_cache.move_to_end(key)
+                    results[i] = cached
+                elif key not in misses:
+                    misses[key] = i
+
+        if not misses:
+            return results
+
         try:
-            pred = self.quality_model.predict(processed_texts, k=-1)
-            score_list = []
-            for labels, scores in zip(*pred):
-                score = sum(self.quality_score_dict.get(l, 0) *
-                            s for l, s in zip(labels, scores))
-                score_list.append(float(score))
-            return score_list
+            # Only the three scored labels matter, so don't ask for every label
+            labels, scores = self.quality_model.predict(
+                [processed_texts[i] for i in misses.values()], k=len(self.quality_score_dict))
+            weights = np.array(
+                [[self.quality_score_dict.get(l, 0) for l in row] for row in labels],
+                dtype=np.float64)
+            computed = dict(zip(misses, (weights * np.asarray(
+                scores, dtype=np.float64)).sum(axis=1).tolist()))
         except Exception as e:
             logger.error(f"Error during quality prediction: {e}")
             return [0.0] * len(text_list)
 
+        with self._score_cache_lock:
+            self._score_cache.update(computed)
+            while len(self._score_cache) > SCORE_CACHE_SIZE:
+                self._score_cache.popitem(last=False)
+
+        for i, key in enumerate(keys):
+            if key in computed:
+                results[i] = computed[key]
+        return results
+
     def filter_quality_content(self, text: str, min_score: float = 0.2) -> Tuple[str, float]:
         """Filter content based on quality score"""
         if not text.strip():
@@ -68,7 +115,7 @@ class QualityFilterService:
 
         if quality_score >= min_score:
             # Basic cleaning - more sophisticated cleaning might be needed
-            cleaned_text = re.sub(r'\s+', ' ', text).strip()
+            cleaned_text = _WHITESPACE_RE.sub(' ', text).strip()
             return cleaned_text, quality_score
         else:
             return "", quality_score
@@ -78,5 +125,16 @@ class QualityFilterService:
         return self.quality_model is not None
 
 
-# Create a singleton instance
-quality_filter_service = QualityFilterService()
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_quality_filter_service():
+    """Shared QualityFilterService, created (and its model loaded) on first use"""
+    global _instance
+    if _instance is None:
+        # Concurrent first callers wait here rather than loading the model twice
+        with _instance_lock:
+            if _instance is None:
+                _instance = QualityFilterService()
+    return _instance
@@ -1,10 +1,24 @@
 import os
 import logging
+import threading
 from typing import List, Dict
+import numpy as np
+import torch
 from sentence_transformers import CrossEncoder
 
+from .onnx_backend import ONNX_AVAILABLE, OnnxCrossEncoder
+
 logger = logging.getLogger(__name__)
 
+DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+
+# "auto" uses int8 ONNX Runtime on CPU when optimum is installed, "onnx" forces
+# it, "st" always uses the sentence-transformers CrossEncoder
+RERANKER_BACKEND = os.environ.get("RERANKER_BACKEND", "auto")
+
+RERANKER_MAX_LENGTH = 1024
+RERANKER_BATCH_SIZE = int(os.environ.get("RERANKER_BATCH_SIZE", 32))
+
 
 class RerankerService:
     def __init__(self):
@@ -12,16 +26,38 @@ class RerankerService:
         self.model_name = os.environ.get(
             "RERANKER_MODEL", "jinaai/jina-reranker-v2-base-multilingual")
         self.reranker = None
+        self.backend = None
         self._initialize_model()
 
     def _initialize_model(self):
         """Initialize the CrossEncoder reranker model"""
+        use_onnx = RERANKER_BACKEND == "onnx" or (
+            RERANKER_BACKEND == "auto" and DEVICE == "cpu")
+        if use_onnx and ONNX_AVAILABLE:
+            try:
+                logger.info(
+                    f"Loading reranker model with ONNX Runtime (int8): {self.model_name}")
+                self.reranker = OnnxCrossEncoder(
+                    self.model_name, max_length=RERANKER_MAX_LENGTH, trust_remote_code=True)
+                self.backend = "onnx"
+                logger.info(
+                    f"Reranker model loaded successfully: {self.model_name}")
+                return
+            except Exception as e:
+                logger.warning(
+                    f"ONNX Runtime reranker load failed, falling back to CrossEncoder: {str(e)}")
+        elif use_onnx and RERANKER_BACKEND == "onnx":
+            logger.warning(
+                "RERANKER_BACKEND=onnx but optimum/onnxruntime are not installed")
+
         try:
             logger.info(f"Loading reranker model: {self.model_name}")
             # Use sentence_transformers CrossEncoder
-            # Add `device='cuda'` if GPU is available and desired
-            self.reranker = CrossEncoder(self.model_name,
-                                         max_length=1024, trust_remote_code=True)
+            self.reranker = CrossEncoder(self.model_name, device=DEVICE,
+                                         max_length=RERANKER_MAX_LENGTH, trust_remote_code=True)
+            # Inference only: disable dropout
+            self.reranker.model.eval()
+            self.backend = "sentence-transformers"
             logger.info(
                 f"Reranker model loaded successfully: {self.model_name}")
         except Exception as e:
@@ -53,27 +89,42 @@ class RerankerService:
         logger.info(
             f"Reranking {len(documents)} documents for query: '{query[:50]}...' (top_k={top_k})")
 
-        # Prepare pairs for the CrossEncoder: [ [query, doc_text1], [query, doc_text2], ... ]
-        sentence_pairs = [[query, doc['text']] for doc in documents]
-
-        # Predict scores
-        scores = self.reranker.predict(sentence_pairs, convert_to_tensor=False)
-
-        # Combine scores with original documents and sort
-        scored_documents = []
-        for i, doc in enumerate(documents):
-            scored_documents.append({
-                "id": doc['id'],
-                "text": doc['text'],
-                "score": float(scores[i])  # Ensure score is float
-            })
-
-        # Sort documents by score in descending order
-        reranked_docs = sorted(
-            scored_documents, key=lambda x: x['score'], reverse=True)
-
-        # Select top_k results
-        top_results = reranked_docs[:top_k]
+        texts = [doc['text'] for doc in documents]
+
+        # Predict scores on length-sorted pairs so each batch pads to similar lengths
+        order = np.argsort([len(text) for text in texts], kind='stable')
+        # No autograd bookkeeping for the forward-only PyTorch path
+        with torch.inference_mode():
+            sorted_scores = np.asarray(self.reranker.predict(
+                [[query, texts[i]] for i in order],
+                batch_size=RERANKER_BATCH_SIZE,
+                show_progress_bar=False,
+                convert_to_numpy=True
+            ), dtype=np.float32)
+        # Restore the original document order
+        scores = np.empty_like(sorted_scores)
+        scores[order] = sorted_scores
+
+        # Partially select the top_k, then sort only those by score (descending)
+        if 0 < top_k < len(scores):
+            # Everything above the k-th score, then the earliest documents tied
+            # with it, so ties resolve by input order as in a stable full sort
+            kth = -np.partition(-scores, top_k - 1)[top_k - 1]
+            above = np.flatnonzero(scores > kth)
+            ties = np.flatnonzero(scores == kth)[:top_k - len(above)]
+            top_indices = np.concatenate((above, ties))
+            top_indices = top_indices[np.argsort(
+                -scores[top_indices], kind='stable')]
+        else:
+            # Same slice semantics as before for top_k <= 0 or >= len(documents)
+            top_indices = np.argsort(-scores, kind='stable')[:top_k]
+
+        # One tolist() call converts the selected scores to Python floats
+        top_results = [{
+            "id": documents[i]['id'],
+            "text": texts[i],
+            "score": score
+        } for i, score in zip(top_indices.tolist(), scores[top_indices].tolist())]
 
         logger.info(
             f"Successfully reranked documents. Returning top {len(top_results)}.")
@@ -84,9 +135,21 @@ class RerankerService:
         """Get information about the current reranker model"""
         return {
             "model": self.model_name,
-            "loaded": self.is_model_loaded()
+            "loaded": self.is_model_loaded(),
+            "backend": self.backend
         }
 
 
-# Create a singleton instance
-reranker_service = RerankerService()
+_instance = None
+_instance_lock = threading.Lock()
+
+
+def get_reranker_service():
+    """Shared RerankerService, created (and its model loaded) on first use"""
+    global _instance
+    if _instance is None:
+        # Concurrent first callers wait here rather than loading the model twice
+        with _instance_lock:
+            if _instance is None:
+                _instance = RerankerService()
+    return _instance
@@ -1,11 +1,15 @@
 import os
+import atexit
 import logging
 import asyncio
+import contextlib
 import re
-from typing import List, Dict, Optional
-from urllib.parse import urlparse
+import httpx
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+from urllib.parse import urlparse, unquote
 from bs4 import BeautifulSoup
-import wikipediaapi
 
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode, HTTPCrawlerConfig
 from crawl4ai.async_crawler_strategy import AsyncHTTPCrawlerStrategy
@@ -13,45 +17,223 @@ from crawl4ai.extraction_strategy import NoExtractionStrategy
 from crawl4ai.content_filter_strategy import PruningContentFilter
 from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
 
+from .chunker import chunker
+from .event_loop import run_async
+
 logger = logging.getLogger(__name__)
 
+# libxml2-backed lxml parses far faster than BeautifulSoup, which stays as the
+# fallback when lxml is not installed
+try:
+    from lxml import html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Worker coroutines scraping web URLs per request; unbounded fan-out only adds contention
+SCRAPE_CONCURRENCY = int(os.environ.get("SCRAPE_CONCURRENCY", 32))
+
+# crawl4ai error messages meaning the crawler itself (browser or HTTP session)
+# is gone, rather than that one page failed
+_CRAWLER_GONE_RE = re.compile(
+    r'(browser|context)( has been)? (closed|crashed|disconnected)|session is closed',
+    re.IGNORECASE)
+
+# Threads running page parsing and quality filtering off the event loop; lxml
+# and fastText release the GIL in their C/C++ code
+_PARSE_POOL = ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 1, thread_name_prefix="scrape-parse")
+
+# Elements tried in order for the main text of a page
+MAIN_CONTENT_TAGS = ('main', 'article', 'body')
+
+
+def parse_html(html_content: str):
+    """Parse a page once with lxml for the extractors below (None without lxml or on failure)"""
+    if not LXML_AVAILABLE or not html_content:
+        return None
+    try:
+        try:
+            return lxml_html.fromstring(html_content)
+        except ValueError:
+            # Strings carrying an XML encoding declaration are only accepted as bytes
+            return lxml_html.fromstring(html_content.encode('utf-8'))
+    except Exception as e:
+        logger.warning(f"lxml could not parse HTML: {e}")
+        return None
+
+
+def extract_main_text(html_content: str, tree=None) -> str:
+    """Newline-joined text of the first main content element (or the whole page)"""
+    if tree is None:
+        tree = parse_html(html_content)
+    if tree is None:
+        soup = BeautifulSoup(html_content, 'html.parser')
+        node = next((found for found in map(soup.find, MAIN_CONTENT_TAGS)
+                     if found is not None), soup)
+        return node.get_text(separator='\n', strip=True)
+
+    node = next((found for found in (tree.find(f'.//{tag}') for tag in MAIN_CONTENT_TAGS)
+                 if found is not None), tree)
+    return '\n'.join(text for text in map(str.strip, node.itertext()) if text)
+
+
 # -- Date Extraction Util --
 
 
-def extract_date_from_html(html_content: str) -> Optional[str]:
+# Order matters: try more specific/reliable tags first
+_DATE_PATTERNS = [re.compile(pattern, re.IGNORECASE | re.DOTALL) for pattern in (
+    # JSON-LD
+    r'<script type="application/ld\+json"[^>]*>.*?"datePublished"\s*:\s*"([^"]+)".*?<\/script>',
+    r'<script type="application/ld\+json"[^>]*>.*?"dateModified"\s*:\s*"([^"]+)".*?<\/script>',
+    # Meta tags
+    r'<meta\s+(?:property|name)=["\'](?:article:published_time|og:published_time|publication_date|publish_date|published|datePublished|date)["\']\s+content=["\']([^"\']+)["\']',
+    r'<meta\s+(?:property|name)=["\'](?:article:modified_time|og:updated_time|dateModified|lastmod)["\']\s+content=["\']([^"\']+)["\']',
+    # Time tags
+    r'<time[^>]+datetime=["\']([^ "\']+)["\'][^>]*>.*?</time>'
+)]
+
+_TITLE_RE = re.compile(r'<title>(.*?)<\/title>', re.IGNORECASE | re.DOTALL)
+
+
+# <meta> property/name values, lowercased, for published and modified dates
+_META_PUBLISHED = {'article:published_time', 'og:published_time', 'publication_date',
+                   'publish_date', 'published', 'datepublished', 'date'}
+_META_MODIFIED = {'article:modified_time',
+                  'og:updated_time', 'datemodified', 'lastmod'}
+# Index in _scan_metadata's date candidates for each recognised <meta> key
+_META_DATE_SLOTS = {**dict.fromkeys(_META_PUBLISHED, 2),
+                    **dict.fromkeys(_META_MODIFIED, 3)}
+
+# crawl4ai metadata fields that carry a publication date, most reliable first
+_METADATA_DATE_KEYS = ('publishedDate', 'datePublished', 'article:published_time',
+                       'og:published_time')
+
+# Tags _scan_metadata visits; libxml2 filters them during its own tree walk,
+# which is several times faster than the equivalent XPath union
+_METADATA_TAGS = ('title', 'script', 'meta', 'time')
+
+
+def _json_ld_value(data, key):
+    """First non-empty string stored under key anywhere in parsed JSON-LD"""
+    if isinstance(data, dict):
+        value = data.get(key)
+        if isinstance(value, str) and value:
+            return value
+        children = data.values()
+    elif isinstance(data, list):
+        children = data
+    else:
+        return None
+    for child in children:
+        value = _json_ld_value(child, key)
+        if value:
+            return value
+    return None
+
+
+def _scan_metadata(tree) -> Tuple[Optional[str], Optional[str]]:
+    """(title, publication date) from a single pass over <title>, JSON-LD, <meta> and <time> nodes"""
+    title = None
+    # Date candidates in the same priority order as _DATE_PATTERNS
+    found = [None] * len(_DATE_PATTERNS)
+    for node in tree.iter(*_METADATA_TAGS):
+        tag = node.tag
+        if tag == 'meta':  # By far the most common, so checked first
+            content = node.get('content')
+            if content is None:
+                continue
+            slot = _META_DATE_SLOTS.get(
+                (node.get('property') or node.get('name') or '').lower())
+            if slot is not None and not found[slot]:
+                found[slot] = content.strip()
+        elif tag == 'title':
+            if title is None:
+                title = node.text_content().strip()
+        elif tag == 'script':
+            if node.get('type') != 'application/ld+json':
+                continue
+            try:
+                data = orjson.loads(node.text or '')
+            except orjson.JSONDecodeError:
+                continue
+            found[0] = found[0] or _json_ld_value(data, 'datePublished')
+            found[1] = found[1] or _json_ld_value(data, 'dateModified')
+            if found[0] and title is not None:
+                break  # Nothing ranks higher
+        else:
+            found[4] = found[4] or (node.get('datetime') or '').strip()
+    return title, next((value for value in found if value), None)
+
+
+def extract_date_from_html(html_content: str, tree=None) -> Optional[str]:
     """Extract publication date from HTML content using various patterns"""
-    # Order matters: try more specific/reliable tags first
-    patterns = [
-        # JSON-LD
-        r'<script type="application/ld\+json"[^>]*>.*?"datePublished"\s*:\s*"([^"]+)".*?<\/script>',
-        r'<script type="application/ld\+json"[^>]*>.*?"dateModified"\s*:\s*"([^"]+)".*?<\/script>',
-        # Meta tags
-        r'<meta\s+(?:property|name)=["\'](?:article:published_time|og:published_time|publication_date|publish_date|published|datePublished|date)["\']\s+content=["\']([^"\']+)["\']',
-        r'<meta\s+(?:property|name)=["\'](?:article:modified_time|og:updated_time|dateModified|lastmod)["\']\s+content=["\']([^"\']+)["\']',
-        # Time tags
-        r'<time[^>]+datetime=["\']([^ "\']+)["\'][^>]*>.*?</time>'
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, html_content, re.IGNORECASE | re.DOTALL)
+    if tree is not None:
+        return _scan_metadata(tree)[1]
+
+    for pattern in _DATE_PATTERNS:
+        match = pattern.search(html_content)
         if match and match.group(1):
             # Basic validation/normalization could be added here
             return match.group(1)
     return None
 
+
+def extract_title_from_html(html_content: str, tree=None) -> Optional[str]:
+    """Text of the page's <title> element"""
+    if tree is not None:
+        return _scan_metadata(tree)[0]
+    title_match = _TITLE_RE.search(html_content)
+    return title_match.group(1).strip() if title_match else None
+
+
+def extract_html_fields(html_content: str, include_text: bool = True) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """(main text, title, publication date) of a page from a single parse"""
+    tree = parse_html(html_content)
+    if tree is None:
+        text = extract_main_text(html_content) if include_text else None
+        return text, extract_title_from_html(html_content), extract_date_from_html(html_content)
+
+    title, published_date = _scan_metadata(tree)
+    text = extract_main_text(html_content, tree) if include_text else None
+    return text, title, published_date
+
 # -- Wikipedia Util --
 
 
-def get_wikipedia_content(url: str) -> Optional[str]:
-    """Retrieve content from Wikipedia using WikipediaAPI"""
+# Created on the shared event loop and kept open, so concurrent and repeat
+# lookups reuse pooled keep-alive connections to Wikipedia
+_wikipedia_client = None
+
+
+def _wikipedia_title(url: str) -> str:
+    """Article title from a /wiki/ URL"""
+    return unquote(url.split('/wiki/')[-1].split('#')[0]).replace('_', ' ')
+
+
+async def get_wikipedia_content(url: str) -> Optional[str]:
+    """Retrieve the plain text of a Wikipedia article with one Action API request"""
+    global _wikipedia_client
+    if _wikipedia_client is None:
+        _wikipedia_client = httpx.AsyncClient(
+            headers={'User-Agent': 'ODRPythonBackend/1.0'},
+            timeout=httpx.Timeout(15.0, connect=5.0))
+    title = _wikipedia_title(url)
     try:
-        wiki = wikipediaapi.Wikipedia(
-            user_agent="ODRPythonBackend/1.0", language='en')
-        title = url.split('/wiki/')[-1].replace('_', ' ')  # Handle underscores
-        page = wiki.page(title)
-        if page.exists():
+        # The article's own host, so other language editions work too
+        response = await _wikipedia_client.get(
+            f"https://{urlparse(url).netloc}/w/api.php",
+            params={
+                'action': 'query', 'prop': 'extracts', 'explaintext': 1,
+                'exsectionformat': 'plain', 'redirects': 1, 'titles': title,
+                'format': 'json', 'formatversion': 2
+            })
+        response.raise_for_status()
+        pages = response.json().get('query', {}).get('pages', [])
+        content = pages[0].get('extract') if pages else None
+        if content:
             logger.info(f"Fetched Wikipedia content for: {title}")
-            return page.text
+            return content
         else:
             logger.warning(f"Wikipedia page not found for title: {title}")
             return None
@@ -65,6 +247,141 @@ class ScraperProcessor:
         """Initialize the scraper processor with optional quality filter service"""
         self.quality_filter_service = quality_filter_service
 
+        # Crawlers (and Playwright's browser) live for the whole process on the
+        # shared event loop, so requests reuse warm browsers and connections
+        self._crawlers = {}
+        self._crawler_lock = None
+        self._shutdown_registered = False
+        # Requests currently using each crawler (by id), and crawlers that were
+        # replaced after a failure but are closed only once those requests finish
+        self._crawler_users = {}
+        self._retired_crawlers = {}
+
+    def _create_crawler(self, crawling_strategy: str):
+        """Build an (unstarted) crawler for the given strategy"""
+        if crawling_strategy == 'http':
+            http_config = HTTPCrawlerConfig(
+                method="GET",
+                headers={
+                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"},
+                follow_redirects=True,
+                verify_ssl=True
+            )
+            return AsyncWebCrawler(
+                crawler_strategy=AsyncHTTPCrawlerStrategy(
+                    browser_config=http_config)
+            )
+        playwright_config = BrowserConfig(
+            headless=True, verbose=False)
+        return AsyncWebCrawler(config=playwright_config)
+
+    async def _get_crawler(self, crawling_strategy: str):
+        """Started crawler shared by all requests using this strategy, counted as one more user"""
+        if self._crawler_lock is None:
+            self._crawler_lock = asyncio.Lock()
+        async with self._crawler_lock:
+            crawler = self._crawlers.get(crawling_strategy)
+            if crawler is not None and not self._crawler_alive(crawler):
+                logger.warning(
+                    f"Shared crawler is no longer usable, replacing it (Strategy: {crawling_strategy})")
+                stale = self._retire_crawler(crawling_strategy, crawler)
+                if stale is not None:
+                    await self._close_crawler(stale)
+                crawler = None
+            if crawler is None:
+                logger.info(
+                    f"Starting shared crawler (Strategy: {crawling_strategy})")
+                crawler = self._create_crawler(crawling_strategy)
+                await crawler.__aenter__()
+                self._crawlers[crawling_strategy] = crawler
+                if not self._shutdown_registered:
+                    self._shutdown_registered = True
+                    atexit.register(self._shutdown)
+            key = id(crawler)
+            self._crawler_users[key] = self._crawler_users.get(key, 0) + 1
+            return crawler
+
+    async def _release_crawler(self, crawler):
+        """Drop one user of a crawler, closing it if it was retired and is now idle"""
+        key = id(crawler)
+        async with self._crawler_lock:
+            users = self._crawler_users.get(key, 1) - 1
+            if users:
+                self._crawler_users[key] = users
+                return
+            self._crawler_users.pop(key, None)
+            if self._retired_crawlers.pop(key, None) is None:
+                return
+        await self._close_crawler(crawler)
+
+    @contextlib.asynccontextmanager
+    async def _use_crawler(self, crawling_strategy: str):
+        """Shared crawler held for the duration of one request"""
+        crawler = await self._get_crawler(crawling_strategy)
+        try:
+            yield crawler
+        finally:
+            await self._release_crawler(crawler)
+
+    @staticmethod
+    def _crawler_alive(crawler) -> bool:
+        """Best-effort check that a started crawler's browser or HTTP session is still open"""
+        try:
+            if getattr(crawler, 'ready', True) is False:
+                return False
+            strategy = getattr(crawler, 'crawler_strategy', None)
+            browser = getattr(getattr(strategy, 'browser_manager', None), 'browser', None)
+            if browser is not None and not browser.is_connected():
+                return False
+            session = getattr(strategy, '_session', None)
+            return not getattr(session, 'closed', False)
+        except Exception as e:
+            logger.warning(f"Could not check crawler health: {e}")
+            return True
+
+    def _retire_crawler(self, crawling_strategy: str, crawler):
+        """Stop sharing a crawler (under the crawler lock), returning it if nothing uses it and it can be closed now"""
+        if self._crawlers.get(crawling_strategy) is not crawler:
+            # Another request replaced it already
+            return None
+        del self._crawlers[crawling_strategy]
+        if self._crawler_users.get(id(crawler)):
+            # Closed by the last request still using it
+            self._retired_crawlers[id(crawler)] = crawler
+            return None
+        return crawler
+
+    async def _discard_crawler(self, crawling_strategy: str, crawler):
+        """Replace a shared crawler after a failure so the next request starts a fresh one
+
+        Only the crawler the failing request used is dropped (another request
+        may have replaced it already), and it is closed once no request uses it.
+        """
+        async with self._crawler_lock:
+            crawler = self._retire_crawler(crawling_strategy, crawler)
+        if crawler is not None:
+            await self._close_crawler(crawler)
+
+    async def _close_crawler(self, crawler):
+        """Close a crawler (and its browser), logging rather than raising errors"""
+        try:
+            await crawler.__aexit__(None, None, None)
+        except Exception as e:
+            logger.warning(f"Error closing crawler: {e}")
+
+    def _shutdown(self):
+        """Close the shared crawlers (and browsers) when the process exits"""
+        async def close_all():
+            crawlers = [*self._crawlers.values(), *self._retired_crawlers.values()]
+            self._crawlers.clear()
+            self._retired_crawlers.clear()
+            for crawler in crawlers:
+                await self._close_crawler(crawler)
+        try:
+            run_async(close_all(), timeout=10)
+        except Exception as e:
+            logger.warning(f"Error shutting down crawlers: {e}")
+
     def process_scraped_data(self, url: str, scrape_result: object, html_content: Optional[str]) -> Dict:
         """Processes the raw data obtained from crawl4ai or Wikipedia."""
         result_base = {
@@ -85,23 +402,29 @@ class ScraperProcessor:
             if raw_content:
                 raw_content = getattr(raw_content, 'raw_markdown', None)
 
-            if not raw_content and html_content:
+            # Title and date crawl4ai already read from the page's metadata
+            metadata = getattr(scrape_result, 'metadata', None) or {}
+            metadata_title = metadata.get('title')
+            published_date = next((metadata[key] for key in _METADATA_DATE_KEYS
+                                   if metadata.get(key)), None)
+
+            # One parse of the HTML serves the content fallback, title and date,
+            # and is skipped entirely when the crawl already provided all three
+            html_title = None
+            needs_html_parse = not raw_content or not metadata_title or not published_date
+            if html_content and needs_html_parse:
                 try:
-                    soup = BeautifulSoup(html_content, 'html.parser')
-                    # Extract text from main content areas if possible, otherwise full text
-                    main_content = soup.find('main') or soup.find(
-                        'article') or soup.find('body')
-                    if main_content:
-                        raw_content = main_content.get_text(
-                            separator='\n', strip=True)
-                    else:
-                        raw_content = soup.get_text(separator='\n', strip=True)
-                    logger.info(
-                        f"Used HTML fallback for content extraction for {url}")
+                    html_text, html_title, html_date = extract_html_fields(
+                        html_content, include_text=not raw_content)
+                    published_date = published_date or html_date
+                    if not raw_content:
+                        # Text from main content areas if possible, otherwise full text
+                        raw_content = html_text
+                        logger.info(
+                            f"Used HTML fallback for content extraction for {url}")
                 except Exception as bs_error:
                     logger.warning(
-                        f"BeautifulSoup parsing failed for {url}: {bs_error}")
-                    raw_content = None  # Ensure raw_content is None if parsing fails
+                        f"HTML parsing failed for {url}: {bs_error}")
 
             if not raw_content:
                 result_base["error"] = "Failed to extract any content (Markdown or HTML)."
@@ -112,21 +435,14 @@ class ScraperProcessor:
 
             # Extract Title
             # Try scrape_result metadata first, then HTML title, then fallback
-            result_base["title"] = getattr(
-                scrape_result, 'metadata', {}).get('title')
-            if not result_base["title"] and html_content:
-                title_match = re.search(
-                    r'<title>(.*?)<\/title>', html_content, re.IGNORECASE | re.DOTALL)
-                if title_match:
-                    result_base["title"] = title_match.group(1).strip()
+            result_base["title"] = metadata_title
+            if not result_base["title"]:
+                result_base["title"] = html_title
             if not result_base["title"]:
                 result_base["title"] = os.path.basename(
                     urlparse(url).path) or url
 
-            # Extract Date
-            if html_content:
-                result_base["publishedDate"] = extract_date_from_html(
-                    html_content)
+            result_base["publishedDate"] = published_date
 
             # Quality Filtering
             if self.quality_filter_service:
@@ -157,24 +473,44 @@ class ScraperProcessor:
     async def scrape_urls(self,
                           urls: List[str],
                           query: Optional[str] = None,
-                          crawling_strategy: str = 'http'
+                          crawling_strategy: str = 'http',
+                          chunk_content: bool = False
                           ) -> Dict[str, Dict]:
-        """Scrape and process multiple URLs using the specified strategy"""
-        # Filter out non-HTTP URLs early
-        valid_urls = [u for u in urls if isinstance(
-            u, str) and u.startswith('http')]
-        invalid_urls = [u for u in urls if u not in valid_urls]
+        """Scrape and process multiple URLs using the specified strategy
+
+        With chunk_content, each successful result also carries "chunks":
+        its processed content split by the chunker as soon as it is ready.
+        Must be awaited on the shared event loop (see run_async), which owns
+        the crawlers.
+        """
+        def _chunk(processed_data):
+            """Attach the chunks of a processed result (runs on _PARSE_POOL)"""
+            if chunk_content and processed_data.get("success") and processed_data.get("processed_content"):
+                try:
+                    processed_data["chunks"] = chunker.split_text(
+                        processed_data["processed_content"])
+                except Exception as e:
+                    # The caller chunks any result without "chunks" itself
+                    logger.error(
+                        f"Error chunking content for {processed_data['url']}: {e}")
+            return processed_data
+
+        # Triage in one pass: non-HTTP URLs fail early, Wikipedia URLs use its API
+        invalid_urls, wiki_urls, web_urls = [], [], []
+        for url in urls:
+            if not isinstance(url, str) or not url.startswith(('http://', 'https://')):
+                invalid_urls.append(url)
+            elif 'wikipedia.org/wiki/' in url:
+                wiki_urls.append(url)
+            else:
+                web_urls.append(url)
         scrape_results_dict = {url: {"url": url, "success": False,
                                      "error": "Invalid URL format", "relevant_chunks": None} for url in invalid_urls}
 
-        # Separate Wikipedia URLs
-        wiki_urls = [url for url in valid_urls if 'wikipedia.org/wiki/' in url]
-        web_urls = [url for url in valid_urls if url not in wiki_urls]
-
-        # Process Wikipedia URLs directly
-        for url in wiki_urls:
+        async def _wikipedia_result(url):
+            """Fetch one Wikipedia URL and shape it as a scrape result"""
             logger.info(f"Processing Wikipedia URL: {url}")
-            content = get_wikipedia_content(url)
+            content = await get_wikipedia_content(url)
             # Initialize dictionary for the current URL
             processed_result = {
                 "url": url, "success": False, "error": None,
@@ -186,15 +522,19 @@ class ScraperProcessor:
                 processed_result["success"] = True
                 processed_result["raw_content"] = content
                 processed_result["processed_content"] = content
-                processed_result["title"] = url.split(
-                    '/wiki/')[-1].replace('_', ' ')
+                processed_result["title"] = _wikipedia_title(url)
                 processed_result["quality_score"] = 1.0  # Assign high score
                 logger.info(f"Successfully processed Wikipedia URL: {url}")
+                if chunk_content:
+                    await asyncio.get_running_loop().run_in_executor(
+                        _PARSE_POOL, _chunk, processed_result)
             else:
                 processed_result["error"] = "Failed to fetch Wikipedia content."
                 logger.warning(processed_result["error"])
-            # Assign the processed result for the current URL
-            scrape_results_dict[url] = processed_result
+            return processed_result
+
+        # Fetch Wikipedia URLs concurrently while the crawler handles the web URLs
+        wiki_task = asyncio.gather(*map(_wikipedia_result, wiki_urls))
 
         # Process Web URLs using a single crawler instance
         if web_urls:
@@ -209,43 +549,65 @@ class ScraperProcessor:
                     content_filter=PruningContentFilter())
             )
 
+            # URLs whose fetch failed because of the crawler rather than the page
+            crawler_failures = []
+
             # Define the async task helper function
             async def _scrape_task(crawler, url):
                 try:
                     logger.info(f"Starting scrape task for: {url}")
-                    raw_scrape_result = await crawler.arun(url=url, config=crawler_config)
-                    processed_data = self.process_scraped_data(
-                        url, raw_scrape_result, getattr(raw_scrape_result, 'html', None))
+                    try:
+                        raw_scrape_result = await crawler.arun(url=url, config=crawler_config)
+                    except Exception:
+                        crawler_failures.append(url)
+                        raise
+                    if not getattr(raw_scrape_result, 'success', True) and _CRAWLER_GONE_RE.search(
+                            getattr(raw_scrape_result, 'error_message', None) or ''):
+                        crawler_failures.append(url)
+                    # Parse (and chunk) in a thread so other scrapes keep making progress
+                    processed_data = await asyncio.get_running_loop().run_in_executor(
+                        _PARSE_POOL, lambda: _chunk(self.process_scraped_data(
+                            url, raw_scrape_result, getattr(raw_scrape_result, 'html', None))))
                     return processed_data
                 except Exception as task_exc:
                     logger.error(
                         f"Exception in scrape task for {url}: {task_exc}", exc_info=True)
                     return {"url": url, "success": False, "error": f"Task-level exception: {str(task_exc)}", "relevant_chunks": None}
 
+            async def _scrape_all(crawler, urls):
+                """Scrape urls with a fixed pool of workers pulling from a queue"""
+                queue = asyncio.Queue()
+                for index, url in enumerate(urls):
+                    queue.put_nowait((index, url))
+                results = [None] * len(urls)
+
+                async def worker():
+                    while not queue.empty():
+                        index, url = queue.get_nowait()
+                        results[index] = await _scrape_task(crawler, url)
+
+                # At most SCRAPE_CONCURRENCY scrapes in flight, whatever the URL count
+                await asyncio.gather(*(worker() for _ in range(min(SCRAPE_CONCURRENCY, len(urls)))))
+                if len(crawler_failures) == len(urls):
+                    # Failures are reported per URL, so a dead browser or session
+                    # never raises here; replace it so later requests can succeed
+                    logger.warning(
+                        f"All {len(urls)} fetches failed in the crawler, replacing it (Strategy: {crawling_strategy})")
+                    await self._discard_crawler(crawling_strategy, crawler)
+                return results
+
             # Define the main async function to run the tasks
             results_list = []
-            crawler_instance = None
+            crawler = None
             try:
                 # --- Select Crawler Strategy ---
                 if crawling_strategy == 'http':
                     logger.info("Using AsyncHTTPCrawlerStrategy")
-                    http_config = HTTPCrawlerConfig(
-                        method="GET",
-                        headers={
-                            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"},
-                        follow_redirects=True,
-                        verify_ssl=True
-                    )
-                    crawler_instance = AsyncWebCrawler(
-                        crawler_strategy=AsyncHTTPCrawlerStrategy(
-                            browser_config=http_config)
-                    )
 
                     # *** Handle PDFs separately for HTTP strategy ***
-                    http_web_urls = [
-                        url for url in web_urls if not url.lower().endswith('.pdf')]
-                    pdf_urls = [
-                        url for url in web_urls if url.lower().endswith('.pdf')]
+                    http_web_urls, pdf_urls = [], []
+                    for url in web_urls:
+                        (pdf_urls if url[-4:].lower() == '.pdf' else http_web_urls).append(url)
 
                     # Add error results for PDFs immediately to results_list
                     pdf_error_results = []
@@ -261,42 +623,34 @@ class ScraperProcessor:
                     # Add PDF errors first
                     results_list.extend(pdf_error_results)
 
-                    # *** Run non-PDF HTTP tasks serially for debugging ***
                     scraped_http_results = []
                     if http_web_urls:
                         logger.info(
-                            f"Running {len(http_web_urls)} non-PDF HTTP tasks serially...")
-                        async with crawler_instance as crawler:
-                            for url in http_web_urls:
-                                result = await _scrape_task(crawler, url)
-                                scraped_http_results.append(result)
-                        logger.info("Finished serial non-PDF HTTP tasks.")
+                            f"Running {len(http_web_urls)} non-PDF HTTP tasks concurrently (limit {SCRAPE_CONCURRENCY})...")
+                        async with self._use_crawler(crawling_strategy) as crawler:
+                            scraped_http_results = await _scrape_all(crawler, http_web_urls)
+                        logger.info("Finished concurrent non-PDF HTTP tasks.")
                     else:
                         logger.info(
                             "No non-PDF web URLs to process with HTTP strategy.")
                     # Add scraped results
                     results_list.extend(scraped_http_results)
-                    # *** End serial execution block ***
 
                 else:  # Playwright strategy (processes all web_urls, including PDFs)
                     logger.info("Using default AsyncPlaywrightCrawlerStrategy")
-                    playwright_config = BrowserConfig(
-                        headless=True, verbose=False)
-                    crawler_instance = AsyncWebCrawler(
-                        config=playwright_config)
 
                     logger.info(
-                        f"Running {len(web_urls)} Playwright tasks concurrently...")
-                    async with crawler_instance as crawler:
-                        tasks = [_scrape_task(crawler, url)
-                                 for url in web_urls]
-                        results_list = await asyncio.gather(*tasks)
+                        f"Running {len(web_urls)} Playwright tasks concurrently (limit {SCRAPE_CONCURRENCY})...")
+                    async with self._use_crawler(crawling_strategy) as crawler:
+                        results_list = await _scrape_all(crawler, web_urls)
                     logger.info("Finished concurrent Playwright tasks.")
                 # --- End Strategy Selection ---
 
             except Exception as main_exc:
                 logger.error(
-                    f"Error during AsyncWebCrawler context or gather/serial execution (Strategy: {crawling_strategy}): {main_exc}", exc_info=True)
+                    f"Error during AsyncWebCrawler context or gather execution (Strategy: {crawling_strategy}): {main_exc}", exc_info=True)
+                if crawler is not None:
+                    await self._discard_crawler(crawling_strategy, crawler)
                 # Create error results for all web_urls if crawler setup/execution fails
                 # Combine pre-existing PDF errors with new errors
                 existing_errors = {
@@ -319,4 +673,8 @@ class ScraperProcessor:
                     logger.error(
                         f"Received invalid result structure from scrape task: {res}")
 
+        for processed_result in await wiki_task:
+            # Assign the processed result for the current URL
+            scrape_results_dict[processed_result["url"]] = processed_result
+
         return scrape_results_dict
@@ -0,0 +1,29 @@
+import os
+import shutil
+import logging
+
+logger = logging.getLogger(__name__)
+
+# RAM-backed filesystem for short-lived files (downloads, execution sandboxes)
+TMPFS_DIR = os.environ.get("TMPFS_DIR", "/dev/shm")
+
+# Larger files go to the default temp dir; the same amount must stay free on
+# the tmpfs, which also rules out tiny mounts such as Docker's 64 MB /dev/shm
+TMPFS_MAX_FILE_SIZE = int(os.environ.get(
+    "TMPFS_MAX_FILE_SIZE", 256 * 1024 * 1024))
+
+TMPFS_AVAILABLE = os.path.isdir(TMPFS_DIR) and os.access(TMPFS_DIR, os.W_OK)
+if not TMPFS_AVAILABLE:
+    logger.info(
+        f"{TMPFS_DIR} is not writable, temporary files stay on the default temp dir")
+
+
+def ram_temp_dir(size: int = 0):
+    """Directory to pass as tempfile's dir= for `size` bytes (None means the default temp dir)"""
+    if not TMPFS_AVAILABLE or size > TMPFS_MAX_FILE_SIZE:
+        return None
+    try:
+        free = shutil.disk_usage(TMPFS_DIR).free
+    except OSError:
+        return None
+    return TMPFS_DIR if free >= size + TMPFS_MAX_FILE_SIZE else None
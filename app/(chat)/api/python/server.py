@@ -1,28 +1,143 @@
-from flask import Flask, request, jsonify
 import os
+
+# Thread pools must be sized before torch/numpy are first imported. Worker
+# processes (WEB_CONCURRENCY) share the cores instead of oversubscribing them.
+_CPU_COUNT = os.cpu_count() or 1
+_TORCH_THREADS = int(os.environ.get("TORCH_NUM_THREADS", max(
+    1, _CPU_COUNT // max(1, int(os.environ.get("WEB_CONCURRENCY", 1))))))
+os.environ.setdefault("OMP_NUM_THREADS", str(_TORCH_THREADS))
+os.environ.setdefault("MKL_NUM_THREADS", str(_TORCH_THREADS))
+
+import torch
+
+torch.set_num_threads(_TORCH_THREADS)
+torch.set_num_interop_threads(2)
+
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 import logging
 import asyncio
 import numpy as np
+import orjson
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
 from modules import (
     convert_document_from_url,
-    embedding_service,
-    reranker_service,
-    quality_filter_service,
+    convert_document_batch,
+    get_embedding_service,
+    get_reranker_service,
+    get_quality_filter_service,
+    run_async,
     ScraperProcessor,
     chunker
 )
-from modules.code_executor import execute_python_code, MAX_TIMEOUT
+from modules.code_executor import execute_python_code, get_worker_pool, MAX_TIMEOUT
+from modules.embedding_service import encode_b64
 
 # Configure logging
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# libuv's event loop has much cheaper socket handling than the default asyncio
+# loop for the crawler's many small reads; uvloop is optional (not on Windows).
+# The policy applies to the shared event loop, created after this.
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("Using uvloop for asyncio event loops")
+except ImportError:
+    pass
+
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """jsonify and request.get_json backed by orjson, which also serializes numpy values"""
+
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(self, obj) -> bytes:
+        """UTF-8 JSON straight from orjson, for response bodies"""
+        return orjson.dumps(obj, default=self.default, option=self.option)
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Skip the str round trip of dumps()
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+# Threads that convert each scrape request's PDF URLs while its crawl runs
+PDF_CONVERT_WORKERS = int(os.environ.get("PDF_CONVERT_WORKERS", 8))
+_pdf_executor = ThreadPoolExecutor(
+    max_workers=PDF_CONVERT_WORKERS, thread_name_prefix="pdf-convert")
+
+# Binary embedding responses are streamed in slices of roughly this size
+EMBED_STREAM_BYTES = 1024 * 1024
+
+# Fields every scrape-process result carries (None when not applicable), so
+# later steps can read them without membership checks
+RESULT_FIELDS = ("quality_score", "relevant_chunks",
+                 "processed_content", "title", "error")
+
+# Seconds a request waits for its crawl before giving up on (and cancelling)
+# it; below gunicorn's worker timeout so the request can still answer
+SCRAPE_TIMEOUT = float(os.environ.get("SCRAPE_TIMEOUT", 100))
+
+# Embeddings of recent research queries, which recur heavily within a session
+QUERY_EMBEDDING_CACHE_SIZE = int(
+    os.environ.get("QUERY_EMBEDDING_CACHE_SIZE", 1024))
+
+# Models load lazily on first use; by default warm_up() loads them in a
+# background thread right away so the first requests do not wait
+WARM_MODELS = os.environ.get("WARM_MODELS", "true").lower() == "true"
+
+
+_scraper_processor = None
+_scraper_processor_lock = threading.Lock()
+
+
+def get_scraper_processor():
+    """Scraper processor with the quality filter service, built on first use"""
+    global _scraper_processor
+    if _scraper_processor is None:
+        # Concurrent first callers wait here rather than each building a
+        # processor (and later a shared crawler) of their own
+        with _scraper_processor_lock:
+            if _scraper_processor is None:
+                _scraper_processor = ScraperProcessor(get_quality_filter_service())
+    return _scraper_processor
+
+
+def _warm_models():
+    """Load every model in the background so startup does not block on them"""
+    for getter in (get_embedding_service, get_reranker_service, get_quality_filter_service):
+        try:
+            getter()
+        except Exception as e:
+            logger.error(f"Background model warm-up failed: {str(e)}")
+
 
-# Initialize the scraper processor with quality filter service
-scraper_processor = ScraperProcessor(quality_filter_service)
+def warm_up():
+    """Start the code execution workers and (unless disabled) the model warm-up
+
+    Called once per server process: from gunicorn's post_worker_init hook or
+    the __main__ block, never at import time, so processes that merely import
+    this module (e.g. spawned workers re-running it as __mp_main__) start nothing.
+    """
+    get_worker_pool()
+    if WARM_MODELS:
+        threading.Thread(target=_warm_models, name="model-warmup", daemon=True).start()
 
 # ============== DOCUMENT CONVERSION ENDPOINT ==============
 
@@ -47,7 +162,13 @@ def convert_document():
 
 @app.route('/api/python/embed', methods=['POST'])
 def get_embeddings():
-    """Generate embeddings for a list of texts"""
+    """Generate embeddings for a list of texts.
+
+    Pass `?format=f16` to receive the raw float16 matrix as
+    application/octet-stream (shape in the X-Shape header) instead of JSON,
+    or `?format=b64` for JSON carrying the float16 bytes base64-encoded. The
+    format may also be given as a `format` field of the JSON body.
+    """
     try:
         data = request.get_json()
 
@@ -56,19 +177,60 @@ def get_embeddings():
                 "error": "Request body must be JSON with a 'texts' array."
             }), 400
 
+        # The query string wins; JSON clients can send it in the body instead
+        output_format = request.args.get('format') or data.get('format') or 'json'
+        if output_format not in ('json', 'f16', 'b64'):
+            return jsonify({"error": "Invalid 'format'. Must be 'json', 'f16' or 'b64'."}), 400
+
+        batch_size = data.get('batch_size')
+        if batch_size is not None and (not isinstance(batch_size, int) or batch_size < 1):
+            return jsonify({"error": "'batch_size' must be a positive integer if provided."}), 400
+
         texts = data['texts']
         logger.info(f"Generating embeddings for {len(texts)} texts")
 
         if not texts:
+            if output_format == 'b64':
+                # Keep the shape clients decode, even with no rows
+                return jsonify(encode_b64(np.empty((0, 0), dtype=np.float32)))
             return jsonify({"embeddings": []})
 
         # Generate embeddings
         try:
-            embeddings = embedding_service.generate_embeddings(texts)
-            model_info = embedding_service.get_model_info()
+            embeddings = get_embedding_service().generate_embeddings_np(
+                texts, batch_size)
+            model_info = get_embedding_service().get_model_info()
 
             logger.info(f"Successfully generated {len(embeddings)} embeddings")
 
+            if output_format == 'f16':
+                # Convert and send one slice at a time instead of building
+                # the whole float16 copy and byte string up front
+                rows = max(1, EMBED_STREAM_BYTES // (embeddings.shape[1] * 2))
+
+                def generate():
+                    for start in range(0, embeddings.shape[0], rows):
+                        yield embeddings[start:start + rows].astype(np.float16).tobytes()
+
+                return Response(
+                    generate(),
+                    mimetype='application/octet-stream',
+                    headers={
+                        "X-Shape": f"{embeddings.shape[0]},{embeddings.shape[1]}",
+                        "X-Dtype": "float16",
+                        "X-Model": model_info["model"],
+                        "Content-Length": str(embeddings.shape[0] * embeddings.shape[1] * 2)
+                    })
+
+            if output_format == 'b64':
+                return jsonify({
+                    **encode_b64(embeddings),
+                    "model": model_info["model"],
+                    "dimensions": model_info["dimensions"],
+                    "count": len(texts)
+                })
+
+            # orjson serializes the ndarray directly, no per-float Python objects
             return jsonify({
                 "embeddings": embeddings,
                 "model": model_info["model"],
@@ -91,7 +253,7 @@ def get_embeddings():
 @app.route('/api/python/rerank', methods=['POST'])
 def rerank_documents():
     """Rerank documents based on a query using a local CrossEncoder model."""
-    if not reranker_service.is_model_loaded():
+    if not get_reranker_service().is_model_loaded():
         logger.error("Reranker model failed to load and is unavailable.")
         return jsonify({"error": "Reranking service is unavailable due to model load failure."}), 503
 
@@ -106,7 +268,7 @@ def rerank_documents():
         top_k = data.get('top_k', 5)
 
         try:
-            top_results = reranker_service.rerank_documents(
+            top_results = get_reranker_service().rerank_documents(
                 query, documents, top_k)
             return jsonify({"reranked_documents": top_results})
 
@@ -123,6 +285,84 @@ def rerank_documents():
 # ============== SCRAPING & PROCESSING ENDPOINT ==============
 
 
+def _pdf_result(pdf_url, conversion_result):
+    """Shape one PDF conversion into a scrape-process result entry"""
+    if isinstance(conversion_result, tuple):  # Error case
+        response_dict, status_code = conversion_result
+        error_message = response_dict.get(
+            'error', f'Direct PDF conversion failed with status {status_code}')
+        logger.warning(
+            f"Failed to convert PDF {pdf_url}: {error_message}")
+        return {
+            "url": pdf_url,
+            "success": False,
+            "processed_content": None,
+            "title": None,
+            "error": error_message,
+            "quality_score": None,  # No quality score applicable here
+            "relevant_chunks": None
+        }
+    # Success case
+    logger.info(f"Successfully converted PDF {pdf_url}")
+    return {
+        "url": pdf_url,
+        "success": True,
+        "processed_content": conversion_result.get('text'),
+        "title": conversion_result.get('title'),
+        "error": None,
+        "quality_score": 1.0,  # Assume high quality for direct conversion
+        "relevant_chunks": None
+    }
+
+
+def _convert_pdf_urls(pdf_urls):
+    """Convert PDF URLs, one worker process each, into scrape-process result entries"""
+    try:
+        # Call the direct PDF converter
+        conversion_results = convert_document_batch(pdf_urls)
+    except Exception as pdf_err:
+        logger.error(
+            f"Exception during direct PDF conversion of {len(pdf_urls)} URLs: {pdf_err}", exc_info=True)
+        return {pdf_url: {
+            "url": pdf_url,
+            "success": False,
+            "processed_content": None,
+            "title": None,
+            "error": f"Server error during PDF conversion: {str(pdf_err)}",
+            "quality_score": None,
+            "relevant_chunks": None
+        } for pdf_url in pdf_urls}
+    return {pdf_url: _pdf_result(pdf_url, result)
+            for pdf_url, result in zip(pdf_urls, conversion_results)}
+
+
+@lru_cache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)
+def _embed_query_cached(query: str) -> bytes:
+    """float32 bytes of a query's embedding (immutable, so safe to share from the cache)"""
+    return get_embedding_service().generate_embeddings_np([query])[0].tobytes()
+
+
+def embed_query(query: str) -> np.ndarray:
+    """Read-only embedding of a query, cached on its whitespace-normalized text"""
+    # Case is kept: only uncased models would map differently-cased queries together
+    return np.frombuffer(_embed_query_cached(' '.join(query.split())), dtype=np.float32)
+
+
+async def _scrape_and_embed_query(urls, query, crawling_strategy):
+    """Scrape urls while the query is embedded on a worker thread"""
+    query_task = asyncio.create_task(asyncio.to_thread(embed_query, query))
+    # Results come back already chunked, each as soon as its content was ready
+    scrape_results = await get_scraper_processor().scrape_urls(
+        urls, query, crawling_strategy, chunk_content=True)
+    try:
+        query_embedding = await query_task
+    except Exception as e:
+        # The chunking step embeds the query again
+        logger.error(f"Error embedding query during scraping: {e}")
+        query_embedding = None
+    return scrape_results, query_embedding
+
+
 @app.route('/api/python/scrape-process', methods=['POST'])
 def scrape_process_urls():
     """Scrape and process URLs, handling PDFs directly and others via ScraperProcessor."""
@@ -133,6 +373,10 @@ def scrape_process_urls():
         extract_top_k_chunks = data.get('extract_top_k_chunks')
         crawling_strategy = data.get(
             'crawling_strategy', 'http')  # Default remains http
+        # How chunks are scored against the query: bi-encoder cosine similarity
+        # ("embed") or the CrossEncoder ("rerank"), for callers that would
+        # rerank the selected chunks afterwards anyway
+        prechunk_method = data.get('prechunk_method', 'embed')
 
         # --- Validation ---
         if not urls or not isinstance(urls, list):
@@ -145,6 +389,11 @@ def scrape_process_urls():
             return jsonify({"error": "'query' is required when 'extract_top_k_chunks' is provided."}), 400
         if crawling_strategy not in ['http', 'playwright']:
             return jsonify({"error": "Invalid 'crawling_strategy'. Must be 'http' or 'playwright'."}), 400
+        if prechunk_method not in ['embed', 'rerank']:
+            return jsonify({"error": "Invalid 'prechunk_method'. Must be 'embed' or 'rerank'."}), 400
+        if extract_top_k_chunks and prechunk_method == 'rerank' and not get_reranker_service().is_model_loaded():
+            logger.error("Reranker model failed to load and is unavailable.")
+            return jsonify({"error": "Reranking service is unavailable due to model load failure."}), 503
 
         logger.info(
             f"Received scrape-process request for {len(urls)} URLs. Strategy for non-PDFs: {crawling_strategy}. Query: '{query[:50] if query else 'N/A'}...' Chunking: {extract_top_k_chunks}"
@@ -154,79 +403,42 @@ def scrape_process_urls():
         pdf_urls = []
         other_urls = []
         for url in urls:
-            if url and isinstance(url, str) and url.lower().strip().endswith('.pdf'):
+            # Lowercase only the 4-character suffix, not the whole URL
+            if url and isinstance(url, str) and url.rstrip()[-4:].lower() == '.pdf':
                 pdf_urls.append(url)
             else:
                 other_urls.append(url)
 
         all_results_dict = {}
+        query_embedding = None
 
-        # Process PDFs directly
+        # Convert PDFs in the background while the scraper runs, so their
+        # downloads and parsing overlap with the crawl instead of preceding it
+        pdf_future = None
         if pdf_urls:
             logger.info(f"Processing {len(pdf_urls)} PDF URLs directly...")
-            for pdf_url in pdf_urls:
-                try:
-                    # Call the direct PDF converter
-                    conversion_result = convert_document_from_url(pdf_url)
-
-                    if isinstance(conversion_result, tuple):  # Error case
-                        response_dict, status_code = conversion_result
-                        error_message = response_dict.get(
-                            'error', f'Direct PDF conversion failed with status {status_code}')
-                        logger.warning(
-                            f"Failed to convert PDF {pdf_url}: {error_message}")
-                        all_results_dict[pdf_url] = {
-                            "url": pdf_url,
-                            "success": False,
-                            "processed_content": None,
-                            "title": None,
-                            "error": error_message,
-                            "quality_score": None,  # No quality score applicable here
-                            "relevant_chunks": None
-                        }
-                    else:  # Success case
-                        logger.info(f"Successfully converted PDF {pdf_url}")
-                        all_results_dict[pdf_url] = {
-                            "url": pdf_url,
-                            "success": True,
-                            "processed_content": conversion_result.get('text'),
-                            "title": conversion_result.get('title'),
-                            "error": None,
-                            "quality_score": 1.0,  # Assume high quality for direct conversion
-                            "relevant_chunks": None
-                        }
-                except Exception as pdf_err:
-                    logger.error(
-                        f"Exception during direct PDF conversion for {pdf_url}: {pdf_err}", exc_info=True)
-                    all_results_dict[pdf_url] = {
-                        "url": pdf_url,
-                        "success": False,
-                        "processed_content": None,
-                        "title": None,
-                        "error": f"Server error during PDF conversion: {str(pdf_err)}",
-                        "quality_score": None,
-                        "relevant_chunks": None
-                    }
+            pdf_future = _pdf_executor.submit(
+                _convert_pdf_urls, list(dict.fromkeys(pdf_urls)))
 
         # Process other URLs using ScraperProcessor
         if other_urls:
             logger.info(
                 f"Processing {len(other_urls)} non-PDF URLs using ScraperProcessor (strategy: {crawling_strategy})...")
             try:
-                scrape_results_dict = asyncio.run(
-                    scraper_processor.scrape_urls(other_urls, query, crawling_strategy))
+                # Runs on the shared event loop, which owns the crawlers
+                if query and extract_top_k_chunks and prechunk_method == 'embed':
+                    # The relevance chunking below needs the query vector anyway
+                    scrape_results_dict, query_embedding = run_async(
+                        _scrape_and_embed_query(other_urls, query, crawling_strategy),
+                        timeout=SCRAPE_TIMEOUT)
+                else:
+                    scrape_results_dict = run_async(
+                        get_scraper_processor().scrape_urls(other_urls, query, crawling_strategy),
+                        timeout=SCRAPE_TIMEOUT)
                 # Ensure structure consistency (add None for missing fields if necessary)
-                for url, result in scrape_results_dict.items():
-                    if "quality_score" not in result:
-                        result["quality_score"] = None
-                    if "relevant_chunks" not in result:
-                        result["relevant_chunks"] = None
-                    if "processed_content" not in result:
-                        result["processed_content"] = None
-                    if "title" not in result:
-                        result["title"] = None
-                    if "error" not in result:
-                        result["error"] = None
+                for result in scrape_results_dict.values():
+                    for field in RESULT_FIELDS:
+                        result.setdefault(field, None)
 
                 all_results_dict.update(scrape_results_dict)
             except Exception as scrape_err:
@@ -240,11 +452,14 @@ def scrape_process_urls():
                             "success": False,
                             "processed_content": None,
                             "title": None,
-                            "error": f"Scraping batch failed: {str(scrape_err)}",
+                            "error": f"Scraping batch failed: {str(scrape_err) or type(scrape_err).__name__}",
                             "quality_score": None,
                             "relevant_chunks": None
                         }
 
+        if pdf_future is not None:
+            all_results_dict.update(pdf_future.result())
+
         # Reorder results to match original input order
         ordered_results = [all_results_dict.get(
             url) for url in urls if all_results_dict.get(url)]
@@ -256,60 +471,106 @@ def scrape_process_urls():
                     f"URL {url} was in the input but missing from final results dict!")
                 # Optionally add a placeholder error result if needed
 
+        # Scraped pages arrive chunked; the chunks are internal to the relevance
+        # selection below and never part of the response, even if it fails
+        scraped_chunks = [result.pop("chunks", None) for result in ordered_results]
+
         # Implement relevance chunking if requested (operates on the ordered combined results)
         if query and extract_top_k_chunks and any(r.get("success") and r.get("processed_content") for r in ordered_results):
             logger.info(
-                f"Performing relevance chunking for top {extract_top_k_chunks} chunks on combined results..."
+                f"Performing relevance chunking for top {extract_top_k_chunks} chunks on combined results ({prechunk_method})..."
             )
             try:
-                # Embed the query once
-                query_embedding = np.array(
-                    embedding_service.generate_embeddings([query])[0])
-
-                for result in ordered_results:
-                    # Ensure relevant_chunks field exists
-                    if "relevant_chunks" not in result:
-                        result["relevant_chunks"] = None
-
-                    if result.get("success") and result.get("processed_content"):
-                        content = result["processed_content"]
+                # Embed the query once, unless it was embedded during the scrape
+                if prechunk_method == 'embed' and query_embedding is None:
+                    query_embedding = embed_query(query)
+
+                # First pass: chunk every result and record its span in one shared list
+                all_chunks = []
+                spans = []
+                for result, chunks in zip(ordered_results, scraped_chunks):
+                    # PDFs (and unchunked pages) are chunked here
+                    if chunks is None:
+                        if not (result.get("success") and result.get("processed_content")):
+                            continue
                         try:
-                            chunks = chunker.split_text(content)
-                            if chunks:
-                                chunk_embeddings = np.array(
-                                    embedding_service.generate_embeddings(chunks))
-
-                                # Calculate cosine similarities
-                                similarities = np.dot(chunk_embeddings, query_embedding) / \
-                                    (np.linalg.norm(chunk_embeddings, axis=1)
-                                     * np.linalg.norm(query_embedding))
-
-                                # Get indices of top k chunks
-                                top_k_indices = np.argsort(
-                                    similarities)[-extract_top_k_chunks:][::-1]
-
-                                result["relevant_chunks"] = [chunks[i]
-                                                             for i in top_k_indices]
-                            else:
-                                # No chunks generated
-                                result["relevant_chunks"] = []
-                                logger.warning(
-                                    f"No chunks generated for {result['url']} during relevance chunking.")
+                            chunks = chunker.split_text(result["processed_content"])
                         except Exception as chunking_err:
                             logger.error(
-                                f"Error during relevance chunking/embedding for {result['url']}: {chunking_err}", exc_info=True)
+                                f"Error during relevance chunking for {result['url']}: {chunking_err}", exc_info=True)
                             result["relevant_chunks"] = None  # Indicate error
+                            continue
+                    if chunks:
+                        spans.append((result, len(all_chunks), len(all_chunks) + len(chunks)))
+                        all_chunks.extend(chunks)
+                    else:
+                        # No chunks generated
+                        result["relevant_chunks"] = []
+                        logger.warning(
+                            f"No chunks generated for {result['url']} during relevance chunking.")
+
+                if all_chunks:
+                    # Pages quoting the same passage share it: score each distinct
+                    # chunk once, remembering which row serves every position
+                    unique_rows = {}
+                    rows = [unique_rows.setdefault(chunk, len(unique_rows))
+                            for chunk in all_chunks]
+                    if len(unique_rows) < len(all_chunks):
+                        logger.info(
+                            f"Scoring {len(unique_rows)} distinct chunks of {len(all_chunks)}")
+
+                    if prechunk_method == 'rerank':
+                        # One CrossEncoder pass over the chunks of every result,
+                        # in place of the chunk embeddings and the cosine step
+                        reranked = get_reranker_service().rerank_documents(
+                            query, [{'id': i, 'text': chunk} for chunk, i in unique_rows.items()],
+                            len(unique_rows))
+                        scores = np.empty(len(unique_rows), dtype=np.float32)
+                        for doc in reranked:
+                            scores[doc['id']] = doc['score']
+                        similarities = scores[rows]
+                    else:
+                        # One embedding call for the chunks of every result
+                        chunk_embeddings = get_embedding_service().generate_embeddings_np(
+                            list(unique_rows))
+
+                        # Cosine similarities: the embeddings are unit vectors, so one GEMV.
+                        # Kept in float32: NumPy has no BLAS kernel for float16 or int8,
+                        # and those products run an order of magnitude slower on CPU
+                        similarities = (chunk_embeddings @ query_embedding.astype(
+                            np.float32, copy=False))[rows]
+
+                    # Second pass: top k chunks within each result's slice
+                    for result, start, end in spans:
+                        result_similarities = similarities[start:end]
+                        # Partially select the top k (O(n)), then sort only those (descending)
+                        k = min(extract_top_k_chunks, end - start)
+                        top_k_indices = np.argpartition(result_similarities, -k)[-k:]
+                        top_k_indices = top_k_indices[np.argsort(
+                            result_similarities[top_k_indices])[::-1]]
+                        result["relevant_chunks"] = [all_chunks[start + i]
+                                                     for i in top_k_indices]
 
             except Exception as embedding_err:
                 logger.error(
-                    f"Error embedding query or chunks during relevance selection: {embedding_err}", exc_info=True)
+                    f"Error scoring query or chunks during relevance selection: {embedding_err}", exc_info=True)
                 # Set relevant_chunks to None for all results if query embedding fails
                 for res in ordered_results:
                     res["relevant_chunks"] = None
 
         logger.info(f"Finished scrape-process request for {len(urls)} URLs.")
-        # Return the ordered results
-        return jsonify({"results": ordered_results})
+        all_results_dict.clear()
+
+        # Stream the ordered results one at a time, so only one serialized
+        # result (rather than the whole body) is held in memory at once
+        def generate():
+            yield b'{"results":['
+            for i, result in enumerate(ordered_results):
+                ordered_results[i] = None  # Release each result once it is sent
+                yield (b',' if i else b'') + app.json.dumps_bytes(result)
+            yield b']}'
+
+        return Response(generate(), mimetype='application/json')
 
     except Exception as e:
         logger.error(
@@ -373,8 +634,8 @@ def execute_code():
 @app.route('/', methods=['GET'])
 def index():
     """Root endpoint to provide information about the server"""
-    embedding_info = embedding_service.get_model_info()
-    reranker_info = reranker_service.get_model_info()
+    embedding_info = get_embedding_service().get_model_info()
+    reranker_info = get_reranker_service().get_model_info()
 
     return jsonify({
         "server": "Deep Research Python Services",
@@ -390,7 +651,7 @@ def index():
         "embedding_model": embedding_info["model"],
         "embedding_dimensions": embedding_info["dimensions"],
         "reranker_model": reranker_info["model"] if reranker_info["loaded"] else "N/A (Load Failed)",
-        "quality_model_loaded": quality_filter_service.is_model_loaded(),
+        "quality_model_loaded": get_quality_filter_service().is_model_loaded(),
         "code_execution_max_timeout": MAX_TIMEOUT
     })
 
@@ -409,4 +670,5 @@ if __name__ == '__main__':
         f"- Scrape & Process endpoint: http://localhost:{port}/api/python/scrape-process")
     logger.info(
         f"- Code Execution endpoint: http://localhost:{port}/api/python/execute")
+    warm_up()
     app.run(host='0.0.0.0', port=port)
@@ -0,0 +1,67 @@
+import base64
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Never load the real models at import time; the endpoint test uses a stub
+os.environ.setdefault("WARM_MODELS", "false")
+
+pytest.importorskip("torch")
+pytest.importorskip("sentence_transformers")
+
+# Known matrix and its float16 bytes, also decoded by lib/embeddings.test.ts
+MATRIX = np.array([[0, 1, -2, 0.5], [0.25, -1.5, 3, 1024]], dtype=np.float32)
+MATRIX_B64 = "AAAAPADAADgANAC+AEIAZA=="
+
+
+def test_encode_b64_round_trip():
+    from modules.embedding_service import encode_b64
+
+    payload = encode_b64(MATRIX)
+    assert payload == {"shape": [2, 4], "dtype": "float16", "data": MATRIX_B64}
+    decoded = np.frombuffer(base64.b64decode(payload["data"]), dtype="<f2")
+    np.testing.assert_array_equal(decoded.reshape(payload["shape"]), MATRIX)
+
+
+class _StubEmbeddingService:
+    def generate_embeddings_np(self, texts, batch_size=None):
+        return MATRIX[:len(texts)].copy()
+
+    def get_model_info(self):
+        return {"model": "stub", "dimensions": MATRIX.shape[1]}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    import server
+
+    monkeypatch.setattr(server, "get_embedding_service", _StubEmbeddingService)
+    return server.app.test_client()
+
+
+@pytest.mark.parametrize("query, body", [
+    ("?format=b64", {}),
+    ("", {"format": "b64"}),  # How the Next.js clients ask for it
+])
+def test_embed_b64_response(client, query, body):
+    response = client.post(f"/api/python/embed{query}",
+                           json={"texts": ["a", "b"], **body})
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result["shape"] == [2, 4]
+    assert result["dtype"] == "float16"
+    assert result["data"] == MATRIX_B64
+    assert result["count"] == 2
+
+
+def test_embed_b64_empty(client):
+    response = client.post("/api/python/embed", json={"texts": [], "format": "b64"})
+    assert response.get_json() == {"shape": [0, 0], "dtype": "float16", "data": ""}
+
+
+def test_embed_json_response(client):
+    response = client.post("/api/python/embed", json={"texts": ["a"]})
+    assert response.get_json()["embeddings"] == [MATRIX[0].tolist()]
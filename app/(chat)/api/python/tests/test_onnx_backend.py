@@ -0,0 +1,84 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("torch")
+pytest.importorskip("sentence_transformers")
+tokenizers = pytest.importorskip("tokenizers")
+transformers = pytest.importorskip("transformers")
+
+VOCAB = {"[PAD]": 0, "[UNK]": 1, "[CLS]": 2, "[SEP]": 3,
+         "hello": 4, "world": 5, "again": 6}
+DIMENSIONS = 4
+
+
+def _bert_tokenizer():
+    """Tiny BERT-style fast tokenizer ([CLS] ... [SEP]), built without downloads"""
+    tokenizer = tokenizers.Tokenizer(
+        tokenizers.models.WordLevel(VOCAB, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    tokenizer.post_processor = tokenizers.processors.BertProcessing(
+        ("[SEP]", VOCAB["[SEP]"]), ("[CLS]", VOCAB["[CLS]"]))
+    return transformers.PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, pad_token="[PAD]", unk_token="[UNK]",
+        cls_token="[CLS]", sep_token="[SEP]",
+        model_input_names=["input_ids", "token_type_ids", "attention_mask"])
+
+
+class _BertSession:
+    """Stands in for an ONNX Runtime session of an optimum BERT export"""
+    INPUTS = ("input_ids", "attention_mask", "token_type_ids")
+
+    def get_inputs(self):
+        return [SimpleNamespace(name=name) for name in self.INPUTS]
+
+    def run(self, output_names, feed):
+        # ONNX Runtime rejects a feed missing any declared input
+        missing = set(self.INPUTS) - set(feed)
+        if missing:
+            raise ValueError(f"Required inputs ({sorted(missing)}) are missing from input feed")
+        assert all(value.dtype == np.int64 for value in feed.values())
+        ids = feed["input_ids"]
+        # One-hot-ish token embeddings, so pooled vectors depend on the tokens
+        return [np.eye(len(VOCAB), DIMENSIONS, dtype=np.float32)[ids]]
+
+
+@pytest.fixture
+def service():
+    from modules.embedding_service import EmbeddingService
+    from modules.onnx_backend import OnnxSentenceEncoder
+
+    encoder = OnnxSentenceEncoder.__new__(OnnxSentenceEncoder)
+    encoder.session = _BertSession()
+    encoder.tokenizer = _bert_tokenizer()
+    encoder.max_seq_length = 256
+    encoder.dimension = DIMENSIONS
+    encoder._input_names = {i.name for i in encoder.session.get_inputs()}
+
+    svc = EmbeddingService.__new__(EmbeddingService)
+    svc.embedding_model = encoder
+    svc.backend = "onnx"
+    svc.model_dimensions = DIMENSIONS
+    return svc
+
+
+def test_encode_pretokenized_ids_through_onnx(service):
+    texts = ["hello", "hello world again", "world"]
+    embeddings = service._encode(service._tokenize(texts), batch_size=2)
+
+    assert embeddings.shape == (3, DIMENSIONS)
+    assert embeddings.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(embeddings, axis=1), 1, rtol=1e-5)
+
+
+def test_encode_matches_unpadded_single_texts(service):
+    # Padding in a mixed-length batch must not change any text's embedding
+    texts = ["hello", "hello world again", "world"]
+    batched = service._encode(service._tokenize(texts), batch_size=3)
+    single = np.vstack([service._encode(service._tokenize([text])) for text in texts])
+    np.testing.assert_allclose(batched, single, rtol=1e-6)
@@ -1,4 +1,5 @@
 import { cosineSimilarity } from "ai";
+import { decodeEmbeddings } from "@/lib/embeddings";
 
 /**
  * Interface for a chunk of text with metadata
@@ -226,7 +227,8 @@ export class VectorStoreManager {
         headers: {
           "Content-Type": "application/json",
         },
-        body: JSON.stringify({ texts: validTexts }), // Send only valid texts
+        // Send only valid texts; base64 float16 keeps the response compact
+        body: JSON.stringify({ texts: validTexts, format: "b64" }),
         signal: controller.signal,
       });
 
@@ -240,11 +242,11 @@ export class VectorStoreManager {
 
       const data = await response.json();
 
-      if (!data.embeddings || !Array.isArray(data.embeddings)) {
+      if (typeof data.data !== "string" || !data.shape) {
         throw new Error("Invalid response format from embedding API");
       }
 
-      return data.embeddings;
+      return decodeEmbeddings(data);
     } catch (error: any) {
       console.error("Error fetching embeddings:", error);
       clearTimeout(timeout); // Ensure timeout is cleared on error too
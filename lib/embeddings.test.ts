@@ -0,0 +1,31 @@
+import { describe, expect, it } from "vitest";
+import { decodeEmbeddings } from "./embeddings";
+
+describe("decodeEmbeddings", () => {
+  it("decodes the payload produced by the Python encode_b64", () => {
+    // encode_b64(np.array([[0, 1, -2, 0.5], [0.25, -1.5, 3, 1024]])), also
+    // asserted on the Python side in api/python/tests/test_embed.py
+    const payload = {
+      shape: [2, 4] as [number, number],
+      dtype: "float16" as const,
+      data: "AAAAPADAADgANAC+AEIAZA==",
+    };
+
+    expect(decodeEmbeddings(payload)).toEqual([
+      [0, 1, -2, 0.5],
+      [0.25, -1.5, 3, 1024],
+    ]);
+  });
+
+  it("decodes an empty payload", () => {
+    expect(
+      decodeEmbeddings({ shape: [0, 0], dtype: "float16", data: "" })
+    ).toEqual([]);
+  });
+
+  it("rejects a payload whose size does not match its shape", () => {
+    expect(() =>
+      decodeEmbeddings({ shape: [3, 4], dtype: "float16", data: "AAA8AA==" })
+    ).toThrow("Embedding payload size does not match its shape.");
+  });
+});
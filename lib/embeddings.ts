@@ -0,0 +1,59 @@
+/**
+ * Compact embedding payload returned by the Python `/api/python/embed`
+ * endpoint when called with `format: "b64"`: the float16 matrix as base64
+ * bytes plus its shape, instead of one JSON number per dimension.
+ */
+export interface EncodedEmbeddings {
+  shape: [number, number];
+  dtype: "float16";
+  data: string;
+}
+
+/**
+ * Convert an IEEE 754 half-precision bit pattern to a number.
+ */
+function halfToFloat(bits: number): number {
+  const sign = bits & 0x8000 ? -1 : 1;
+  const exponent = (bits >> 10) & 0x1f;
+  const fraction = bits & 0x03ff;
+
+  if (exponent === 0) {
+    // Zero or subnormal
+    return sign * fraction * 2 ** -24;
+  }
+  if (exponent === 0x1f) {
+    return fraction ? Number.NaN : sign * Number.POSITIVE_INFINITY;
+  }
+  return sign * (1 + fraction / 1024) * 2 ** (exponent - 15);
+}
+
+/**
+ * Decode a base64 float16 embedding payload into embedding vectors.
+ *
+ * @param payload - The `shape`/`dtype`/`data` fields of the embed response
+ * @returns An array of embedding vectors (number[][])
+ */
+export function decodeEmbeddings(payload: EncodedEmbeddings): number[][] {
+  const [rows, dimensions] = payload.shape;
+  if (payload.dtype !== "float16") {
+    throw new Error(`Unsupported embedding dtype: ${payload.dtype}`);
+  }
+
+  const bytes = Buffer.from(payload.data, "base64");
+  if (bytes.length !== rows * dimensions * 2) {
+    throw new Error("Embedding payload size does not match its shape.");
+  }
+
+  // NumPy writes little-endian bytes on every platform the server runs on
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.length);
+  const embeddings: number[][] = new Array(rows);
+  for (let row = 0; row < rows; row++) {
+    const vector = new Array<number>(dimensions);
+    const offset = row * dimensions * 2;
+    for (let i = 0; i < dimensions; i++) {
+      vector[i] = halfToFloat(view.getUint16(offset + i * 2, true));
+    }
+    embeddings[row] = vector;
+  }
+  return embeddings;
+}